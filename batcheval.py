@@ -0,0 +1,141 @@
+import numpy as np
+
+import bitboard
+import evaluation
+
+# A position is encoded as 32 int8 values, one a square in the bitboard's order: 0 for an empty square, 1 for a red
+# man, 2 for a red king, -1 for a black man and -2 for a black king. A batch of positions is an (N, 32) array, built
+# straight from the boards' bit masks so no Counter is looked at. For scoring it is spread out to one column for each
+# kind of square (the code + 2, so kind 0 is a black king and kind 2 an empty square) on each of the 32 squares, column
+# sq * 5 + kind, and every feature is a matrix product of those columns with a table made once. The products are done
+# in 32 bit floating point, which is exact for these small whole numbers and far quicker than NumPy's integer products.
+KINDS = 5
+COLUMNS = 32 * KINDS
+_ONE_HOT = np.eye(KINDS, dtype=np.float32)
+
+
+def column(code, sq):
+    return sq * KINDS + code + 2
+
+
+def encode(red, black, kings):
+    """The (N, 32) int8 encoding of N positions given as sequences of their red, black and king bit masks"""
+    masks = np.array((red, black, kings), dtype="<u4")
+    masks = masks.view(np.uint8).reshape(3, len(masks[0]), 4) # little endian, so bit sq is bit sq % 8 of byte sq // 8
+    redBits, blackBits, kingBits = np.unpackbits(masks, axis=-1, bitorder="little").view(np.int8)
+    return (redBits - blackBits) * (1 + kingBits)
+
+
+def oneHot(squares):
+    """The (N, 160) float32 columns of a batch of encodings, 1 in column sq * 5 + kind for the kind on each square"""
+    return np.take(_ONE_HOT, squares + 2, axis=0).reshape(len(squares), COLUMNS)
+
+
+def _buildPieceSquare(weights):
+    # the weighted sum of the board's incrementally kept features, written as the value of each kind of counter on each
+    # square, so the whole lot is one dot product
+    table = np.zeros(COLUMNS, dtype=np.float32)
+    for (colour, king), keys in zip((("black", False), ("black", True), ("red", False), ("red", True)), evaluation.FEATURE_KEYS):
+        code = (1 if colour == "red" else -1) * (2 if king else 1)
+        for sq, packed in enumerate(keys):
+            table[column(code, sq)] = sum(weights[name] * value for name, value in evaluation.unpack(packed).items())
+    return table
+
+
+def _buildMobilityTables():
+    # the square a step along each diagonal from each square, flattened to sq * 4 + direction. Where that is off the
+    # board it is the square itself, which is never empty when there is a counter on it to move. Then for each kind of
+    # square and diagonal (5, 4), +1 when a red counter of that kind steps that way and -1 for a black one: in
+    # DIRECTIONS order the first two diagonals go down the board, the way black men move, and the last two up.
+    neighbours = np.array([sq if neighbour == None else neighbour for sq in range(32) for neighbour in bitboard.NEIGHBOURS[sq]])
+    movers = np.zeros((KINDS, len(bitboard.DIRECTIONS)), dtype=np.int8)
+    for code in (1, 2, -1, -2):
+        forward = bitboard.UP if code > 0 else bitboard.DOWN
+        for direction, (rowStep, colStep) in enumerate(bitboard.DIRECTIONS):
+            if abs(code) == 2 or rowStep == forward:
+                movers[code + 2, direction] = 1 if code > 0 else -1
+    return neighbours, movers
+
+
+def _buildRunawayTable():
+    # a man is only a runaway in the RUNAWAY_ROWS rows before its crown row, and those rows are different for the two
+    # sides. Columns 0 to 31 count the opposition counters in front of a man on each of those squares and columns 32 to
+    # 63 are +1 where a red man is on one of red's squares and -1 where a black man is on one of black's.
+    table = np.zeros((COLUMNS, 64), dtype=np.float32)
+    for man, opposition, forward in ((1, (-1, -2), bitboard.UP), (-1, (1, 2), bitboard.DOWN)):
+        for sq in bitboard.iterSquares(evaluation.RUNAWAY_ZONE[forward]):
+            table[column(man, sq), 32 + sq] = man
+            for other in bitboard.iterSquares(evaluation.RUNAWAY_CONES[forward][sq]):
+                for code in opposition:
+                    table[column(code, other), sq] = 1
+    return table
+
+NEIGHBOURS, MOVERS = _buildMobilityTables()
+RUNAWAY_TABLE = _buildRunawayTable()
+
+
+def batchMobility(squares, columns):
+    """evaluation.mobility for red minus black, for every position in the batch"""
+    room = np.take(squares, NEIGHBOURS, axis=1) == 0 # (N, 128), each square's diagonals with an empty square next
+    movers = np.take(MOVERS, squares + 2, axis=0).reshape(len(squares), -1)
+    return np.einsum("ij,ij->i", movers, room, dtype=np.int32)
+
+
+def batchRunaways(squares, columns):
+    """evaluation.runaways for red minus black, for every position in the batch"""
+    found = columns @ RUNAWAY_TABLE
+    return (found[:, 32:] * (found[:, :32] == 0)).sum(axis=1)
+
+
+# the features scored on top of the piece-square table. Each takes the (N, 32) encoding of a batch and its (N, 160)
+# columns and returns N values counted for red minus black. A new feature only has to be added here (or to one
+# BatchEvaluation with addFeature) and given a weight.
+BATCH_FEATURES = {"mobility": batchMobility, "runaway": batchRunaways}
+
+
+class BatchEvaluation:
+    """
+    A class to score many boards at once with NumPy, giving the same scores as evaluation.WeightedEvaluation
+
+    ...
+    Attributes
+    -----------
+    weights : dict
+        The weight of every feature, evaluation.DEFAULT_WEIGHTS for any not given
+    pieceSquare : numpy.ndarray
+        The value of each kind of square on each square, made from the weights of evaluation.FEATURES
+    features : dict
+        The name of every other feature to its function, from BATCH_FEATURES
+
+    Methods
+    -------
+    __call__(red, black, kings)
+        returns a list of the scores of the positions with those bit masks, from red's point of view
+    addFeature(name, function, weight)
+        scores another feature, a function like those in BATCH_FEATURES, with weight as well
+    addTable(table, weight)
+        adds a (32, 5) table of values for each kind of square on each square to the piece-square table
+    """
+    def __init__(self, weights=None):
+        self.weights = dict(evaluation.DEFAULT_WEIGHTS)
+        if weights != None:
+            self.weights.update(weights)
+        self.pieceSquare = _buildPieceSquare(self.weights)
+        self.features = dict(BATCH_FEATURES)
+
+    def __call__(self, red, black, kings):
+        squares = encode(red, black, kings)
+        columns = oneHot(squares)
+        scores = columns @ self.pieceSquare
+        for name, feature in self.features.items():
+            weight = self.weights[name]
+            if weight:
+                scores = scores + weight * feature(squares, columns)
+        return scores.astype(np.int64).tolist() # plain integers, so scores can be shared with the parallel search and compared with sys.maxsize
+
+    def addFeature(self, name, function, weight):
+        self.features[name] = function
+        self.weights[name] = weight
+
+    def addTable(self, table, weight=1):
+        self.pieceSquare = self.pieceSquare + weight * np.asarray(table, dtype=np.float32).reshape(COLUMNS)
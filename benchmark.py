@@ -0,0 +1,357 @@
+import argparse
+import multiprocessing
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from checkersEngine import QUIESCENCE_LIMIT, Board, Minimax
+from endgame import DECIDED
+from finalCheckers import GUI, assetPath, loadPygame
+from parallel import ParallelSearch
+from searchstats import StatsRecorder
+from transposition import TranspositionTable
+
+
+def orderingReport(depths=range(4, 9), player=False):
+    """
+    Searches the opening position to each depth with move ordering off and on and returns a row per depth of
+    (depth, nodes without ordering, nodes with ordering, reduction as a fraction, seconds without, seconds with).
+    The transposition table is turned off so only the ordering is being measured. Black moves first.
+    """
+    rows = []
+    for depth in depths:
+        counts = []
+        for ordering in (False, True):
+            minimax = Minimax(tableBytes=None)
+            minimax.ordering = ordering
+            board = Board()
+            start = time.perf_counter()
+            minimax.minimaxMain(board, depth, player, minimax.minsize, minimax.maxsize)
+            counts.append((minimax.nodes, time.perf_counter() - start))
+        (before, beforeTime), (after, afterTime) = counts
+        rows.append((depth, before, after, 1 - after / before, beforeTime, afterTime))
+    return rows
+
+
+def printOrderingReport(depths):
+    print("depth  nodes unordered  nodes ordered  reduction  time unordered  time ordered")
+    for depth, before, after, reduction, beforeTime, afterTime in orderingReport(depths):
+        print(f"{depth:5d}  {before:15d}  {after:13d}  {reduction:9.1%}  {beforeTime:13.3f}s  {afterTime:11.3f}s")
+
+
+def parallelReport(depth=8, workerCounts=(1, 2, 4, 8, 16), player=False):
+    """
+    Times a fixed depth search of the opening position with one process and then with a ParallelSearch for each of
+    workerCounts. Returns a row per count of (workers, seconds, nodes, speed up over one process).
+    """
+    minimax = Minimax()
+    start = time.perf_counter()
+    minimax.minimaxMain(Board(), depth, player, minimax.minsize, minimax.maxsize)
+    serial = time.perf_counter() - start
+    rows = [(1, serial, minimax.nodes, 1.0)]
+    for workers in workerCounts:
+        if workers > 1:
+            search = ParallelSearch(workers)
+            for future in [search.pool.submit(time.sleep, 0.1) for worker in range(workers)]: # a task for every worker at once, so they are all started before timing
+                future.result()
+            start = time.perf_counter()
+            search.minimaxMain(Board(), depth, player, minimax.minsize, minimax.maxsize)
+            seconds = time.perf_counter() - start
+            rows.append((workers, seconds, search.nodes, serial / seconds))
+            search.close()
+    return rows
+
+
+def printParallelReport(depth, workerCounts):
+    print("workers  seconds     nodes  speed up")
+    for workers, seconds, nodes, speedUp in parallelReport(depth, workerCounts):
+        print(f"{workers:7d}  {seconds:7.3f}  {nodes:8d}  {speedUp:8.2f}")
+
+
+def statsReport(depth=8, player=False, repeats=3):
+    """
+    Searches the opening position to depth with a plain Minimax and with one that has a StatsRecorder attached. Returns
+    the quickest seconds of each and the SearchStats of the recorded search.
+    """
+    timings = []
+    recorded = None
+    for mode in ("off", "on"):
+        best = None
+        for repeat in range(repeats):
+            minimax = Minimax()
+            recorder = StatsRecorder(minimax) if mode == "on" else None
+            start = time.perf_counter()
+            minimax.minimaxMain(Board(), depth, player, minimax.minsize, minimax.maxsize)
+            seconds = time.perf_counter() - start
+            if best == None or seconds < best:
+                best = seconds
+            if mode == "on":
+                recorded = recorder.last
+        timings.append((mode, best))
+    return timings, recorded
+
+
+def batchReport(depths=(6, 7, 8), player=False):
+    """
+    Searches the opening position to each depth with the leaves scored one at a time and with the batch evaluation at
+    depth 1 nodes. Returns a row per depth and mode of (depth, mode, seconds, nodes, fraction of the time spent
+    evaluating), the time measured with a StatsRecorder attached to both.
+    """
+    rows = []
+    for depth in depths:
+        for mode, batch in (("one by one", False), ("batch", True)):
+            minimax = Minimax(batch=batch)
+            recorder = StatsRecorder(minimax)
+            minimax.minimaxMain(Board(), depth, player, minimax.minsize, minimax.maxsize)
+            stats = recorder.last
+            rows.append((depth, mode, stats.seconds, stats.nodes, stats.phaseSeconds["evaluate"] / stats.seconds))
+            recorder.close()
+    return rows
+
+
+def printBatchReport(depths):
+    print("depth  leaves scored  seconds     nodes  evaluating")
+    for depth, mode, seconds, nodes, evaluating in batchReport(depths):
+        print(f"{depth:5d}  {mode:13s}  {seconds:7.3f}  {nodes:8d}  {evaluating:10.0%}")
+
+
+def quiescenceReport(depths=range(1, 7), count=100, referenceDepth=9):
+    """
+    Searches count sample positions to each depth with quiescence off and on. Returns a row per depth and mode of
+    (depth, mode, mean nodes, mean seconds, mean change in score from the depth before, fraction of moves the same as a
+    referenceDepth search with quiescence on picks). Positions where a search finds a win or loss are left out of the
+    change in score.
+    """
+    positions = samplePositions(count, seed=3)
+    reference = []
+    for position, player in positions:
+        minimax = Minimax()
+        reference.append(minimax.minimaxMain(Board.fromEncoding(position), referenceDepth, player, minimax.minsize, minimax.maxsize)[0])
+    rows = []
+    for mode, limit in (("off", 0), ("on", QUIESCENCE_LIMIT)):
+        previous = [None] * len(positions)
+        for depth in depths:
+            nodes, seconds, swings, agreed = 0, 0.0, [], 0
+            for index, (position, player) in enumerate(positions):
+                minimax = Minimax(quiescenceLimit=limit)
+                start = time.perf_counter()
+                move, score = minimax.minimaxMain(Board.fromEncoding(position), depth, player, minimax.minsize, minimax.maxsize)
+                seconds += time.perf_counter() - start
+                nodes += minimax.nodes
+                agreed += move == reference[index]
+                if previous[index] != None and abs(score) < DECIDED and abs(previous[index]) < DECIDED:
+                    swings.append(abs(score - previous[index]))
+                previous[index] = score
+            rows.append((depth, mode, nodes / len(positions), seconds / len(positions), sum(swings) / len(swings) if swings else 0.0, agreed / len(positions)))
+    return rows
+
+
+def printQuiescenceReport(depths):
+    print("depth  quiescence  mean nodes  mean ms  mean score change  same move as reference")
+    for depth, mode, nodes, seconds, swing, agreed in sorted(quiescenceReport(depths)):
+        print(f"{depth:5d}  {mode:10s}  {nodes:10.0f}  {seconds * 1000:7.1f}  {swing:17.1f}  {agreed:22.0%}")
+
+
+def printStatsReport(depth):
+    timings, stats = statsReport(depth)
+    off = timings[0][1]
+    for mode, seconds in timings:
+        print(f"stats {mode:3s}  {seconds:.3f}s  {seconds / off - 1:+.1%}")
+    print(f"depth {stats.depth}, {stats.nodes} nodes, {stats.nodesPerSecond():.0f} nodes/s, branching factor {stats.branchingFactor():.2f}")
+    print(f"table hits {stats.tableHits} of {stats.tableProbes} probes")
+    print(f"quiescence {stats.quiescenceNodes} nodes, {stats.quiescenceLimited} left unfinished")
+    print("nodes per ply   " + " ".join(str(nodes) for nodes in stats.nodesPerPly))
+    print("cutoffs per ply " + " ".join(str(cutoffs) for cutoffs in stats.cutoffsPerPly))
+    print("time " + ", ".join(f"{phase} {seconds / stats.seconds:.0%}" for phase, seconds in stats.phaseSeconds.items()))
+
+
+def samplePositions(count=200, seed=0):
+    """Plays random games from the opening and returns count (position encoding, player to move) pairs met along the way"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board, player = Board(), False
+        for ply in range(60):
+            moves = board.generateMoves(player)
+            if not moves or board.checkWinner() != None:
+                break
+            positions.append((board.encode(), player))
+            board.applyMove(rng.choice(moves))
+            player = not player
+    return positions[:count]
+
+
+def moveGenerationReport(seconds=1.0):
+    """
+    Generates every legal move in a fixed sample of positions over and over for about seconds each, with the board scan
+    that walks the counters one square at a time and with the bitboard generator the search uses. Returns a row per
+    generator of (name, moves generated, moves per second).
+    """
+    boards = [(Board.fromEncoding(position), player) for position, player in samplePositions()]
+
+    def scan(board, player):
+        return len(board.scanMoves(player))
+
+    def side(board, player):
+        return len(board.generateMoves(player))
+
+    rows = []
+    for name, generator in (("board scan", scan), ("bitboard", side)):
+        moves = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for board, player in boards:
+                moves += generator(board, player)
+        rows.append((name, moves, moves / (time.perf_counter() - start)))
+    return rows
+
+
+def printMoveGenerationReport():
+    print("generator        moves generated  moves per second")
+    for name, moves, rate in moveGenerationReport():
+        print(f"{name:15s}  {moves:15d}  {rate:16.0f}")
+
+
+def retainedBytes(make, count):
+    """The bytes still allocated per item after making count items with make(index) and keeping them all"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [make(index) for index in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(kept)
+
+
+def memoryReport(count=2000):
+    """
+    Returns a row of (form, bytes per position) for each way a position can be kept: a whole Board with its counters,
+    a Board.encode() tuple, a Board.pack() integer and an entry of the transposition table. Positions come from random
+    games so they are mid game rather than all the starting position.
+    """
+    positions = [position for position, player in samplePositions(count, seed=1)]
+    return [
+        ("Board()", retainedBytes(lambda index: Board(), count)),
+        ("Board.fromEncoding", retainedBytes(lambda index: Board.fromEncoding(positions[index]), count)),
+        ("Board.encode", retainedBytes(lambda index: Board.fromEncoding(positions[index]).encode(), count)), # the board is dropped, so the numbers are counted here
+        ("Board.pack", retainedBytes(lambda index: Board.fromEncoding(positions[index]).pack(), count)),
+        ("table entry", TranspositionTable.entryBytes),
+    ]
+
+
+def printMemoryReport():
+    print("form                  bytes per position  per million")
+    for name, size in memoryReport():
+        print(f"{name:20s}  {size:18.0f}  {size * 1e6 / 2 ** 20:9.0f}MB")
+
+
+def importCost(module, repeats=5):
+    """
+    Imports module in a fresh interpreter repeats times and returns the quickest import in seconds along with whether
+    pygame ended up loaded
+    """
+    code = "import sys, time; start = time.perf_counter(); import " + module + "; print(time.perf_counter() - start, 'pygame' in sys.modules)"
+    best, pygameLoaded = None, None
+    for repeat in range(repeats):
+        seconds, loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()[-2:] # pygame prints a banner first
+        if best == None or float(seconds) < best:
+            best = float(seconds)
+        pygameLoaded = loaded == "True"
+    return best, pygameLoaded
+
+
+def _workerReady(index):
+    return Board().encode() # make sure the engine really is loaded in the worker
+
+
+def workerStartup(method, workers=4):
+    """Seconds for a pool of workers started with method ("fork" or "spawn") to import the engine and answer once each"""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method)) as pool:
+        list(pool.map(_workerReady, range(workers)))
+    return time.perf_counter() - start
+
+
+def redrawReport(frames=300):
+    """
+    Times drawing the opening position the way the window used to, scaling the board and counter images every frame,
+    against the GUI's cached full redraw, an idle frame where nothing changed and a frame after one move. Returns a
+    row per case of (name, milliseconds per frame, window rectangles updated per frame). Needs a display, set
+    SDL_VIDEODRIVER=dummy to run it without one.
+    """
+    pygame = loadPygame()
+    gui = GUI(False)
+    board = Board()
+    gui.setWindow(board)
+    images = [pygame.image.load(assetPath(name)) for name in ("board.png", "counter1.png", "kingcounter1.png", "counter2.png", "kingcounter2.png")]
+    counters = sum(space != None for row in board.board for space in row)
+    start = time.perf_counter()
+    for frame in range(frames): # the old updateBoard, every image scaled again on every frame
+        gui.gameDisplay.blit(pygame.transform.scale(images[0], (800, 800)), (0, 0))
+        for counter in range(counters):
+            gui.gameDisplay.blit(pygame.transform.scale(images[1 + counter % 4], (90, 90)), (0, 0))
+        pygame.display.update()
+    rows = [("scaled every frame", (time.perf_counter() - start) * 1000 / frames, 1)]
+    start = time.perf_counter()
+    for frame in range(frames):
+        gui.updateBoard(board)
+    rows.append(("cached full redraw", (time.perf_counter() - start) * 1000 / frames, 1))
+    for name, change in (("idle frame", False), ("one move per frame", True)):
+        before = gui.rectsUpdated
+        start = time.perf_counter()
+        for frame in range(frames):
+            if change == True:
+                move = board.generateMoves(frame % 2 == 1)[0]
+                undo = board.applyMove(move)
+                gui.updatePlay(board, [])
+                board.undoMove(undo)
+            gui.updatePlay(board, [])
+        count = frames * (2 if change == True else 1)
+        rows.append((name, (time.perf_counter() - start) * 1000 / count, (gui.rectsUpdated - before) / count))
+    pygame.quit()
+    return rows
+
+
+def printRedrawReport():
+    print("frame                 ms per frame  rects updated")
+    for name, milliseconds, rects in redrawReport():
+        print(f"{name:20s}  {milliseconds:12.3f}  {rects:13.1f}")
+
+
+def printStartupReport():
+    print("module          import time  loads pygame")
+    for module in ("bitboard", "checkersEngine", "finalCheckers", "selfplay", "pygame"):
+        seconds, pygameLoaded = importCost(module)
+        print(f"{module:14s}  {seconds * 1000:9.1f}ms  {pygameLoaded}")
+    for method in ("fork", "spawn"):
+        print(f"4 workers started with {method}: {workerStartup(method) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the checkers engine")
+    parser.add_argument("report", choices=["ordering", "parallel", "startup", "redraw", "movegen", "stats", "batch", "memory", "quiescence"], help="which measurement to run")
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 5, 6, 7, 8], help="search depths to measure at")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="worker counts for the parallel report")
+    args = parser.parse_args()
+    if args.report == "ordering":
+        printOrderingReport(args.depths)
+    elif args.report == "parallel":
+        printParallelReport(max(args.depths), args.workers)
+    elif args.report == "startup":
+        printStartupReport()
+    elif args.report == "redraw":
+        printRedrawReport()
+    elif args.report == "movegen":
+        printMoveGenerationReport()
+    elif args.report == "stats":
+        printStatsReport(max(args.depths))
+    elif args.report == "batch":
+        printBatchReport([depth for depth in args.depths if depth >= 6] or args.depths)
+    elif args.report == "memory":
+        printMemoryReport()
+    elif args.report == "quiescence":
+        printQuiescenceReport([depth for depth in args.depths if depth <= 6] or args.depths)
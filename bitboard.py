@@ -0,0 +1,243 @@
+from collections import namedtuple
+
+# The 32 playable (dark) squares are numbered row by row from the top of the board, four to a row.
+# Square sq sits at row sq // 4 and, because the dark squares alternate, at column 2*(sq % 4) + 1 on
+# even rows and 2*(sq % 4) on odd rows. Each colour is then a 32 bit mask with bit sq set when occupied.
+
+FULL = 0xFFFFFFFF
+DOWN = 1 # the direction black men move in
+UP = -1 # the direction red men move in
+DIRECTIONS = ((DOWN, -1), (DOWN, 1), (UP, -1), (UP, 1)) # (row step, column step) of each diagonal
+
+CROWN = {DOWN: 0xF0000000, UP: 0x0000000F} # the end row a side's men are crowned on, by the direction they move in
+
+Move = namedtuple("Move", ["start", "end", "captured", "promotion"], defaults=(False,))
+Move.__doc__ = """
+A move on the bitboard, start and end are square numbers, captured is a tuple of every square hopped over in the order
+they were hopped and promotion is True when the move crowns the counter making it
+"""
+
+
+def squareToPos(sq):
+    row = sq >> 2
+    return row, ((sq & 3) << 1) + 1 - (row & 1)
+
+
+def posToSquare(row, col):
+    return (row << 2) + (col >> 1)
+
+
+def _buildShifts():
+    # for each direction find how far a bit moves on even and odd rows and which squares can step that way without leaving the board
+    shifts = {}
+    for rowStep, colStep in DIRECTIONS:
+        entry = [0, 0, 0, 0] # even shift, even sources, odd shift, odd sources
+        for sq in range(32):
+            row, col = squareToPos(sq)
+            newRow, newCol = row + rowStep, col + colStep
+            if (0 <= newRow <= 7) and (0 <= newCol <= 7):
+                parity = (row & 1) * 2
+                entry[parity] = posToSquare(newRow, newCol) - sq
+                entry[parity + 1] |= 1 << sq
+        shifts[(rowStep, colStep)] = tuple(entry)
+    return shifts
+
+SHIFTS = _buildShifts()
+
+
+def step(bits, direction):
+    """Moves every bit in bits one diagonal square in direction, bits that would leave the board are dropped"""
+    evenShift, evenFrom, oddShift, oddFrom = SHIFTS[direction]
+    even = bits & evenFrom
+    odd = bits & oddFrom
+    if evenShift > 0:
+        moved = even << evenShift
+    else:
+        moved = even >> -evenShift
+    if oddShift > 0:
+        moved |= odd << oddShift
+    else:
+        moved |= odd >> -oddShift
+    return moved & FULL
+
+
+def iterSquares(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _buildTables():
+    # for every square and diagonal (numbered as in DIRECTIONS) the square one step away and the (hopped, landing)
+    # squares of a hop, None where that would leave the board. They are tuples built once
+    # at import, so they are never changed and forked search workers share them with the parent.
+    neighbours, jumps = [], []
+    for sq in range(32):
+        row, col = squareToPos(sq)
+        squareNeighbours, squareJumps = [], []
+        for rowStep, colStep in DIRECTIONS:
+            neighbour, jump = None, None
+            if (0 <= row + rowStep <= 7) and (0 <= col + colStep <= 7):
+                neighbour = posToSquare(row + rowStep, col + colStep)
+                if (0 <= row + 2 * rowStep <= 7) and (0 <= col + 2 * colStep <= 7):
+                    jump = (neighbour, posToSquare(row + 2 * rowStep, col + 2 * colStep))
+            squareNeighbours.append(neighbour)
+            squareJumps.append(jump)
+        neighbours.append(tuple(squareNeighbours))
+        jumps.append(tuple(squareJumps))
+    return tuple(neighbours), tuple(jumps)
+
+NEIGHBOURS, JUMPS = _buildTables()
+SQUARE_POS = tuple(squareToPos(sq) for sq in range(32))
+DIRECTION_INDEX = {direction: index for index, direction in enumerate(DIRECTIONS)}
+# the same for Board.searchJumps, which works in rows and columns: POS_NEIGHBOURS[row][col][direction] is the (row, col)
+# one step away and POS_JUMPS[row][col][direction] the (row, col) landed on by a hop, None off the board
+POS_NEIGHBOURS = tuple(tuple(tuple(SQUARE_POS[neighbour] if neighbour != None else None for neighbour in NEIGHBOURS[posToSquare(row, col)])
+                             for col in range(8)) for row in range(8))
+POS_JUMPS = tuple(tuple(tuple(SQUARE_POS[jump[1]] if jump != None else None for jump in JUMPS[posToSquare(row, col)])
+                        for col in range(8)) for row in range(8))
+
+
+# the diagonals a piece moves along, PIECE_DIRECTIONS[forward][king]
+PIECE_DIRECTIONS = {forward: (tuple(DIRECTION_INDEX[(forward, colStep)] for colStep in (-1, 1)), tuple(range(len(DIRECTIONS)))) for forward in (DOWN, UP)}
+
+
+def _shiftPair(shift):
+    # a shift by a signed amount written as (left, right) so it can be applied as (bits << left) >> right without a branch
+    return (shift, 0) if shift > 0 else (0, -shift)
+
+
+def _buildSideSpecs():
+    # for each forward direction, one entry per diagonal holding everything jumpers and legalMoves need for it:
+    # whether only kings use it, the squares that can hop that way and the shift to bring a landing square back to them,
+    # the single step that goes the opposite way (used to find the counter being hopped), and for rows of each parity
+    # the single step sources, shift and the Move made by each target bit, once for men (whose moves onto the crown row
+    # are promotions) and once for kings. The Move tuples are made once here so generating an ordinary move never allocates.
+    specs = {}
+    for forward in (DOWN, UP):
+        entries = []
+        for direction in DIRECTIONS:
+            evenShift, evenFrom, oddShift, oddFrom = SHIFTS[direction]
+            hopFrom = 0
+            for sq in range(32):
+                if step(step(1 << sq, direction), direction):
+                    hopFrom |= 1 << sq
+            backEvenShift, backEvenFrom, backOddShift, backOddFrom = SHIFTS[(-direction[0], -direction[1])]
+            back = (backEvenFrom,) + _shiftPair(backEvenShift) + (backOddFrom,) + _shiftPair(backOddShift)
+            steps = []
+            for shift, sources in ((evenShift, evenFrom), (oddShift, oddFrom)):
+                menByTarget, kingsByTarget = {}, {}
+                for sq in iterSquares(sources):
+                    menByTarget[1 << (sq + shift)] = Move(sq, sq + shift, (), bool((CROWN[forward] >> (sq + shift)) & 1))
+                    kingsByTarget[1 << (sq + shift)] = Move(sq, sq + shift, ())
+                steps.append((sources,) + _shiftPair(shift) + (menByTarget, kingsByTarget))
+            # two steps the same way cross one even and one odd row, so a hop always moves evenShift + oddShift
+            entries.append((direction[0] != forward, hopFrom) + _shiftPair(-(evenShift + oddShift)) + (back, tuple(steps)))
+        specs[forward] = tuple(entries)
+    return specs
+
+SIDE_SPECS = _buildSideSpecs()
+
+
+def captureSequences(sq, forward, king, opp, empty, kings):
+    """
+    Finds every complete hop sequence for the piece on sq. A sequence carries on for as long as another hop is
+    possible, men only hop forwards while kings may turn in any direction, and no counter can be hopped twice. A man
+    that is crowned, by reaching the crown row or by hopping a king (regicide), ends its move there. Hopped counters
+    stay on the board until the move is over, so they cannot be landed on. empty must include sq. Returns a list of Moves.
+    """
+    moves = []
+    _completeJump(sq, sq, forward, king, opp, empty, kings, (), moves)
+    return moves
+
+
+def _completeJump(start, sq, forward, king, opp, empty, kings, captured, moves):
+    extended = False
+    for direction in PIECE_DIRECTIONS[forward][king]:
+        jump = JUMPS[sq][direction]
+        if jump != None:
+            over, landing = jump
+            if (opp >> over) & (empty >> landing) & 1: # an opposition counter with an empty square behind it
+                extended = True
+                hopped = captured + (over,)
+                if not king and ((CROWN[forward] >> landing) & 1 or (kings >> over) & 1):
+                    moves.append(Move(start, landing, hopped, True)) # crowned, so the move stops here
+                else:
+                    _completeJump(start, landing, forward, king, opp & ~(1 << over), empty, kings, hopped, moves)
+    if not extended and captured: # nothing more to hop, the sequence is complete
+        moves.append(Move(start, sq, captured, False))
+
+
+def jumpers(own, opp, kings, forward, empty):
+    """Mask of the pieces in own that have at least one hop available"""
+    canJump = 0
+    ownKings = own & kings
+    for kingOnly, hopFrom, hopLeft, hopRight, back, steps in SIDE_SPECS[forward]:
+        movers = ownKings if kingOnly else own
+        if movers:
+            movers &= hopFrom & ((empty << hopLeft) >> hopRight) # the landing square is empty
+            if movers:
+                evenFrom, evenLeft, evenRight, oddFrom, oddLeft, oddRight = back # and there is an opposition counter to hop over
+                canJump |= movers & ((((opp & evenFrom) << evenLeft) >> evenRight) | (((opp & oddFrom) << oddLeft) >> oddRight))
+    return canJump
+
+
+def legalMoves(own, opp, kings, forward):
+    """
+    Every legal move for the side owning the pieces in own, with forward the direction its men move in. Forced capture
+    applies to the whole side: if any of its pieces can hop, only complete hop sequences are returned, otherwise the
+    single step moves of every piece are.
+    """
+    empty = ~(own | opp) & FULL
+    canJump = jumpers(own, opp, kings, forward, empty)
+    moves = []
+    if canJump:
+        for sq in iterSquares(canJump):
+            moves += captureSequences(sq, forward, (kings >> sq) & 1, opp, empty | (1 << sq), kings)
+        return moves
+    men = own & ~kings
+    ownKings = own & kings
+    for kingOnly, hopFrom, hopLeft, hopRight, back, steps in SIDE_SPECS[forward]:
+        for sources, left, right, menByTarget, kingsByTarget in steps: # every bit on rows of the same parity moves the same distance
+            for movers, byTarget in ((0 if kingOnly else men, menByTarget), (ownKings, kingsByTarget)):
+                if movers:
+                    targets = (((movers & sources) << left) >> right) & empty
+                    while targets:
+                        low = targets & -targets
+                        moves.append(byTarget[low])
+                        targets ^= low
+    return moves
+
+
+def movePath(move):
+    """The squares a move goes through, its start, every square it lands on between hops and its end"""
+    path = [move.start]
+    row, col = squareToPos(move.start)
+    for over in move.captured:
+        overRow, overCol = squareToPos(over)
+        row, col = 2 * overRow - row, 2 * overCol - col # a hop lands as far past the counter hopped as it started before it
+        path.append(posToSquare(row, col))
+    if not move.captured:
+        path.append(move.end)
+    return path
+
+
+def capturedMask(move):
+    """The bit mask of the squares a move hops over"""
+    captured = 0
+    for over in move.captured:
+        captured |= 1 << over
+    return captured
+
+
+def afterMove(own, opp, kings, move):
+    """The (own, opp, kings) masks after the side owning own makes move, worked out from the masks alone"""
+    moved = (1 << move.start) ^ (1 << move.end) # nothing to flip if a king hopped round to where it started
+    captured = capturedMask(move)
+    if (kings >> move.start) & 1:
+        kings ^= moved
+    kings &= ~captured
+    if move.promotion:
+        kings |= 1 << move.end
+    return own ^ moved, opp & ~captured, kings
@@ -0,0 +1,1057 @@
+import time
+import threading
+import sys # used for getting the max and min integers
+import bitboard
+import endgame
+import evaluation
+import gamerecord
+import transposition
+
+
+# A counter's colour and whether it is a king are two bit flags packed into one small integer, its kind. The kinds run
+# black man, black king, red man, red king, the order transposition.ZOBRIST and evaluation.FEATURE_KEYS are kept in,
+# so a counter's kind indexes them straight away.
+KING_FLAG = 1
+RED_FLAG = 2
+QUIESCENCE_LIMIT = 200 # the most positions the search may visit past each node at its depth to play out the captures pending there
+
+
+class Counter:
+    """
+    A class to represent each counter on a board. It only stores two small integers, so it takes a few dozen bytes
+    rather than the few hundred an object with a dictionary and a list for its position would.
+
+    ...
+    Attributes
+    -----------
+    kind : int
+        RED_FLAG set for a red counter and KING_FLAG set for a king
+    sq : int
+        The playable square the counter is on, see bitboard.py
+    colour : string
+        The colour of the counter as a string, worked out from kind
+    king : Boolean
+        If the counter is a king this value is True, worked out from kind
+    pos : tuple
+        Contains the row and column of the counter, worked out from sq
+
+
+    Methods
+    -------
+    updatePos(row, col)
+        updates the counters pos (position) to the new row and column
+    makeKing()
+        changes king to True
+    unmakeKing()
+        changes king back to False, used when a move is taken back
+    """
+    __slots__ = ("kind", "sq")
+
+    def __init__(self, colour, row, col):
+        self.kind = RED_FLAG if colour == "red" else 0
+        self.sq = bitboard.posToSquare(row, col)
+
+    @property
+    def colour(self):
+        return "red" if self.kind & RED_FLAG else "black"
+
+    @property
+    def king(self):
+        return self.kind & KING_FLAG == KING_FLAG
+
+    @property
+    def pos(self):
+        return bitboard.SQUARE_POS[self.sq]
+
+    def updatePos(self, row, col):
+        self.sq = bitboard.posToSquare(row, col)
+
+    def makeKing(self):
+        self.kind |= KING_FLAG
+
+    def unmakeKing(self):
+        self.kind &= ~KING_FLAG
+
+class Board:
+    """
+    A class to represent the checkers board and to find the moves for the checkers. Its attributes are fixed by
+    __slots__, so a board and its counters carry no attribute dictionaries.
+
+    ...
+    Attributes
+    -----------
+    board : list
+        Is a list of lists that represents the board in list form, when initialised all the counter objects are initialised too
+    reds : int
+        The number of red counters
+    redKings : int
+        The number of red kings
+    blacks : int
+        The number of black counters
+    blackKings : int
+        The number of black kings
+    validMoves : list
+        Contains the list of legal moves that the current selected counter may take, the GUI shows these as hints. An empty tuple until checkValidMoves is called
+    deleltedCheckers : list
+        Contains 2 values, one value is the position of the legal move after the hop, the other is the list of counters it hops
+    redBits : int
+        A 32 bit mask of the playable squares that hold a red counter, kept in step with board
+    blackBits : int
+        A 32 bit mask of the playable squares that hold a black counter
+    kingBits : int
+        A 32 bit mask of the playable squares that hold a king of either colour
+    hash : int
+        The Zobrist hash of the counters on the board, updated by every change to the board. The side to move is not included
+    features : int
+        The evaluation features of the counters on the board (see evaluation.FEATURES) packed into one number, updated alongside hash
+    useBitboard : Boolean
+        Class setting, when True moves are generated from the bit masks rather than by walking board square by square
+
+    Methods
+    -------
+    checkerPresent(row, cow)
+        checks to see if there is a counter present in the position - row , col in board, returns None or the counter object if counter present
+    checkWinner()
+        returns the colour of the player if they have won (due to looking at the checkers left on the board) or returns None if there is not yet a winner
+    checkValidMoves(counter)
+        takes a counter as the parameter and finds where it may legally move to, picked out of the moves of its whole side so a counter that cannot hop has no moves while another counter can
+    movePiece (self, counter, row, col)
+        This method takes a counter updates it into the position row, col, if the counter lands on a kings row, the counter becomes a king. Returns True if the counter was kinged
+    undoMovePiece(counter, row, col, kinged)
+        Puts the counter back on row, col and takes away the king that movePiece gave it if kinged is True
+    delPiece(self, delChecker, fromChecker)
+        This method runs when a hop has occured, the delChecker object is deleted and if this deleted counter is a king, the checker fromChecker is made into a king. Returns True if this regicide happened
+    restorePiece(delChecker, fromChecker, regicide)
+        Puts a deleted counter back on the board, taking the king back off fromChecker if regicide is True
+    returnNoCounters()
+        returns the number of counters for each player, it is used in the minimax evaluation function
+    syncBitboards()
+        rebuilds redBits, blackBits, kingBits, hash and features from board
+    encode()
+        returns the position as a (redBits, blackBits, kingBits) tuple, small and quick to pickle
+    fromEncoding(position)
+        class method that builds a Board, counters and all, from a tuple made by encode()
+    pack()
+        returns the position as one 96 bit integer, the smallest form for storing positions by the million
+    fromPacked(packed)
+        class method that builds a Board from an integer made by pack()
+    generateMoves(player)
+        returns every legal move for the player (True for red, False for black) as bitboard Move tuples. If any counter can hop only complete hop sequences are returned (forced capture)
+    canCapture(player)
+        returns True if the player has a hop available, found from the bit masks without generating any moves
+    scanMoves(player)
+        the same as generateMoves but found by walking the board one counter and square at a time, kept as a slower check on the bitboard generator
+    counterRows(counter)
+        returns the row directions a counter can move in, blacks can only go down, reds can only go up and kings can go either
+    searchJumps(counter, row, col, hopped, moves)
+        adds every complete hop sequence the counter can carry on with from row, col to moves, after already hopping the counters in hopped. Can only hop the oppositions counters, each once
+    jumpMove(counter, end, hopped, promotion)
+        returns the Move for the counter hopping the counters in hopped to end
+    applyMove(move)
+        makes the move on this board and returns what is needed to take it back
+    undoMove(undo)
+        takes back a move made by applyMove, leaving the board exactly as it was before
+    """
+    __slots__ = ("board", "reds", "redKings", "blacks", "blackKings", "validMoves", "deletedCheckers", "redBits", "blackBits", "kingBits", "hash", "features")
+    useBitboard = True
+
+    def __init__(self):
+        self.board = [[None,Counter("black", 0, 1), None, Counter("black", 0, 3), None,Counter("black", 0, 5), None, Counter("black", 0, 7)],
+                      [Counter("black", 1, 0), None, Counter("black", 1, 2), None, Counter("black", 1, 4), None, Counter("black", 1, 6), None],
+                      [None, Counter("black", 2, 1), None, Counter("black", 2, 3), None, Counter("black", 2, 5), None, Counter("black", 2, 7)],
+                      [None,None,None,None,None,None,None,None],
+                      [None,None,None,None,None,None,None,None],
+                      [Counter("red", 5, 0), None, Counter("red", 5, 2), None, Counter("red", 5, 4), None, Counter("red", 5, 6), None],
+                      [None,Counter("red", 6, 1), None, Counter("red", 6, 3), None,Counter("red", 6, 5), None, Counter("red", 6, 7)],
+                      [Counter("red", 7, 0), None, Counter("red", 7, 2), None, Counter("red", 7, 4), None, Counter("red", 7, 6), None]]
+        self.reds = 12
+        self.redKings = 0
+        self.blacks = 12
+        self.blackKings = 0
+        self.validMoves = () # the shared empty tuple until checkValidMoves fills them in, so a board the GUI never selects on costs nothing for them
+        self.deletedCheckers = ()
+        self.syncBitboards()
+
+
+    def encode(self):
+        return self.redBits, self.blackBits, self.kingBits
+
+
+    def pack(self):
+        return self.redBits | self.blackBits << 32 | self.kingBits << 64
+
+
+    @classmethod
+    def fromPacked(cls, packed):
+        return cls.fromEncoding((packed & 0xFFFFFFFF, (packed >> 32) & 0xFFFFFFFF, packed >> 64))
+
+
+    @classmethod
+    def fromEncoding(cls, position):
+        redBits, blackBits, kingBits = position
+        board = cls.__new__(cls) # the starting counters would only be thrown away
+        board.board = [[None] * 8 for row in range(8)]
+        board.reds, board.redKings, board.blacks, board.blackKings = 0, 0, 0, 0
+        board.validMoves = ()
+        board.deletedCheckers = ()
+        for colour, bits in (("red", redBits), ("black", blackBits)):
+            for sq in bitboard.iterSquares(bits):
+                row, col = bitboard.squareToPos(sq)
+                counter = Counter(colour, row, col)
+                board.board[row][col] = counter
+                if colour == "red":
+                    board.reds += 1
+                else:
+                    board.blacks += 1
+                if (kingBits >> sq) & 1:
+                    counter.makeKing()
+                    if colour == "red":
+                        board.redKings += 1
+                    else:
+                        board.blackKings += 1
+        board.syncBitboards()
+        return board
+
+
+    def syncBitboards(self):
+        self.redBits = 0
+        self.blackBits = 0
+        self.kingBits = 0
+        self.hash = 0
+        self.features = 0
+        for row in self.board:
+            for space in row:
+                if space != None:
+                    kind, sq = space.kind, space.sq
+                    self.hash ^= transposition.ZOBRIST[kind][sq]
+                    self.features += evaluation.FEATURE_KEYS[kind][sq]
+                    bit = 1 << sq
+                    if kind & RED_FLAG:
+                        self.redBits |= bit
+                    else:
+                        self.blackBits |= bit
+                    if kind & KING_FLAG:
+                        self.kingBits |= bit
+
+
+    def checkerPresent(self, row, col):
+        return self.board[row][col]
+
+    def checkWinner(self):
+        if self.reds <= 0:
+            return "black"
+        elif self.blacks <= 0:
+            return "red"
+        return None
+
+    def checkValidMoves(self, counter):
+        self.validMoves = []
+        self.deletedCheckers = []
+        start = counter.sq
+        for move in self.generateMoves(counter.colour == "red"): # the whole side's moves, so forced capture covers every counter
+            if move.start == start:
+                row, col = bitboard.squareToPos(move.end)
+                self.validMoves.append([row, col])
+                if move.captured:
+                    hopped = [self.checkerPresent(*bitboard.squareToPos(over)) for over in move.captured]
+                    self.deletedCheckers += [[[row, col], hopped]]
+        return self.validMoves, self.deletedCheckers
+
+
+    def generateMoves(self, player):
+        if self.useBitboard == False:
+            return self.scanMoves(player)
+        if player == True: # red is the AI player and moves up the board
+            return bitboard.legalMoves(self.redBits, self.blackBits, self.kingBits, bitboard.UP)
+        return bitboard.legalMoves(self.blackBits, self.redBits, self.kingBits, bitboard.DOWN)
+
+
+    def canCapture(self, player):
+        empty = ~(self.redBits | self.blackBits) & bitboard.FULL
+        if player == True:
+            return bitboard.jumpers(self.redBits, self.blackBits, self.kingBits, bitboard.UP, empty) != 0
+        return bitboard.jumpers(self.blackBits, self.redBits, self.kingBits, bitboard.DOWN, empty) != 0
+
+
+    def scanMoves(self, player):
+        if player == True:
+            colour = "red"
+        else:
+            colour = "black"
+        jumps = []
+        steps = []
+        for row in self.board:
+            for space in row:
+                if space != None and space.colour == colour:
+                    start = bitboard.posToSquare(space.pos[0], space.pos[1])
+                    self.searchJumps(space, space.pos[0], space.pos[1], [], jumps)
+                    for validRow in self.counterRows(space):
+                        for leftOrRight in (-1, 1):
+                            newPos = bitboard.POS_NEIGHBOURS[space.pos[0]][space.pos[1]][(1 - validRow) + ((leftOrRight + 1) >> 1)]
+                            if newPos != None and self.checkerPresent(newPos[0], newPos[1]) == None: # an empty square to step to
+                                promotion = space.king == False and newPos[0] in (0, 7)
+                                steps.append(bitboard.Move(start, bitboard.posToSquare(newPos[0], newPos[1]), (), promotion))
+        if len(jumps) > 0: # forced capture - if any counter can hop the player must hop
+            return jumps
+        return steps
+
+
+    def counterRows(self, counter): # players can only move in their direction, kings can move in both
+        rows = []
+        if counter.colour == "black" or counter.king == True: # black counters can only move down
+            rows.append(1)
+        if counter.colour == "red" or counter.king == True: # red counters can only move up
+            rows.append(-1)
+        return rows
+
+
+    def searchJumps(self, counter, row, col, hopped, moves):
+        if counter.colour == "black": # find the oppostions counter colour
+            oppColour = "red"
+        else:
+            oppColour = "black"
+        extended = False
+        for validRow in self.counterRows(counter):
+            for leftOrRight in (-1, 1):
+                direction = (1 - validRow) + ((leftOrRight + 1) >> 1) # the index of this diagonal in bitboard.DIRECTIONS, neighbours and hops come from tables made once, so no bounds checks here
+                hopPos = bitboard.POS_JUMPS[row][col][direction]
+                if hopPos == None: # the hop would go over the board dimentions
+                    continue
+                overRow, overCol = bitboard.POS_NEIGHBOURS[row][col][direction]
+                counterPresent = self.checkerPresent(overRow, overCol)
+                landing = self.checkerPresent(hopPos[0], hopPos[1])
+                if counterPresent == None or counterPresent.colour != oppColour or counterPresent in hopped: # only the oppositions counters can be hopped, and each only once
+                    continue
+                if landing != None and landing is not counter: # hopped counters stay on the board until the move is over, the hopping counter's own square is empty
+                    continue
+                extended = True
+                newHop = hopped + [counterPresent]
+                if counter.king == False and (hopPos[0] in (0, 7) or counterPresent.king == True): # the counter is crowned (regicide included) which ends the move
+                    moves.append(self.jumpMove(counter, hopPos, newHop, True))
+                else:
+                    self.searchJumps(counter, hopPos[0], hopPos[1], newHop, moves) # carry on hopping from the new square
+        if extended == False and hopped != []: # nothing more to hop, the sequence is complete
+            moves.append(self.jumpMove(counter, (row, col), hopped, False))
+
+
+    def jumpMove(self, counter, end, hopped, promotion):
+        captured = tuple(bitboard.posToSquare(hop.pos[0], hop.pos[1]) for hop in hopped)
+        return bitboard.Move(bitboard.posToSquare(counter.pos[0], counter.pos[1]), bitboard.posToSquare(end[0], end[1]), captured, promotion)
+
+
+    def movePiece(self, counter, row, col): # moving the counter to its new position located at row, col
+        kinged = False
+        kind = counter.kind
+        start, end = counter.sq, bitboard.posToSquare(row, col)
+        startRow, startCol = bitboard.SQUARE_POS[start]
+        self.board[startRow][startCol] = None # leaves its old position as a None value and then updates self.baord position to its new place,
+        self.board[row][col] = counter # in that order as a king hopping round in a loop can finish where it started
+        zobrist, features = transposition.ZOBRIST[kind], evaluation.FEATURE_KEYS[kind] # the keys of this kind of counter, looked up once
+        self.hash ^= zobrist[start] ^ zobrist[end]
+        self.features += features[end] - features[start]
+        moved = (1 << start) ^ (1 << end) # nothing to flip if the counter finished where it started
+        if kind & RED_FLAG: # flip the old and new squares in the counter's mask
+            self.redBits ^= moved
+        else:
+            self.blackBits ^= moved
+        if kind & KING_FLAG:
+            self.kingBits ^= moved
+        counter.sq = end # updates the counter object
+        if (row == 7 or row == 0) and not kind & KING_FLAG: # doesn't matter which row as cannot move backwards until is a king anyway
+            counter.makeKing() # new counter becomes a king
+            kinged = True
+            self.kingBits |= 1 << end
+            self.hash ^= zobrist[end] ^ transposition.ZOBRIST[kind | KING_FLAG][end]
+            self.features += evaluation.FEATURE_KEYS[kind | KING_FLAG][end] - features[end]
+            if kind & RED_FLAG:
+                self.redKings += 1
+            else:
+                self.blackKings += 1
+        return kinged
+
+
+    def undoMovePiece(self, counter, row, col, kinged): # the reverse of movePiece, row and col are where the counter started
+        start, end = bitboard.posToSquare(row, col), counter.sq
+        if kinged == True:
+            counter.unmakeKing()
+            kind = counter.kind
+            self.kingBits &= ~(1 << end)
+            self.hash ^= transposition.ZOBRIST[kind][end] ^ transposition.ZOBRIST[kind | KING_FLAG][end]
+            self.features += evaluation.FEATURE_KEYS[kind][end] - evaluation.FEATURE_KEYS[kind | KING_FLAG][end]
+            if kind & RED_FLAG:
+                self.redKings -= 1
+            else:
+                self.blackKings -= 1
+        kind = counter.kind
+        endRow, endCol = bitboard.SQUARE_POS[end]
+        self.board[endRow][endCol] = None
+        self.board[row][col] = counter
+        zobrist, features = transposition.ZOBRIST[kind], evaluation.FEATURE_KEYS[kind]
+        self.hash ^= zobrist[start] ^ zobrist[end]
+        self.features += features[start] - features[end]
+        moved = (1 << start) ^ (1 << end)
+        if kind & RED_FLAG:
+            self.redBits ^= moved
+        else:
+            self.blackBits ^= moved
+        if kind & KING_FLAG:
+            self.kingBits ^= moved
+        counter.sq = start
+
+
+    def delPiece(self, delChecker, fromChecker):
+        regicide = False
+        kind, sq = delChecker.kind, delChecker.sq
+        row, col = bitboard.SQUARE_POS[sq]
+        self.board[row][col] = None # resets the deleted counter's position on the board to None
+        self.hash ^= transposition.ZOBRIST[kind][sq]
+        self.features -= evaluation.FEATURE_KEYS[kind][sq]
+        cleared = ~(1 << sq)
+        self.redBits &= cleared
+        self.blackBits &= cleared
+        self.kingBits &= cleared
+        if kind & RED_FLAG: # other board parameters are updated
+            self.reds -= 1
+            if kind & KING_FLAG:
+                self.redKings -= 1
+        else:
+            self.blacks -= 1
+            if kind & KING_FLAG:
+                self.blackKings -= 1
+        fromKind = fromChecker.kind
+        if kind & KING_FLAG and not fromKind & KING_FLAG: #Regicide - if the counter that has been deleted is a king the new counter becomes one, its square joins the kings
+            fromSq = fromChecker.sq
+            self.kingBits |= 1 << fromSq
+            self.hash ^= transposition.ZOBRIST[fromKind][fromSq] ^ transposition.ZOBRIST[fromKind | KING_FLAG][fromSq]
+            self.features += evaluation.FEATURE_KEYS[fromKind | KING_FLAG][fromSq] - evaluation.FEATURE_KEYS[fromKind][fromSq]
+            if fromKind & RED_FLAG:
+                self.redKings += 1
+            else:
+                self.blackKings += 1
+            fromChecker.makeKing()
+            regicide = True
+        return regicide
+
+
+    def restorePiece(self, delChecker, fromChecker, regicide): # the reverse of delPiece
+        if regicide == True:
+            fromChecker.unmakeKing()
+            fromKind, fromSq = fromChecker.kind, fromChecker.sq
+            self.kingBits &= ~(1 << fromSq)
+            self.hash ^= transposition.ZOBRIST[fromKind][fromSq] ^ transposition.ZOBRIST[fromKind | KING_FLAG][fromSq]
+            self.features += evaluation.FEATURE_KEYS[fromKind][fromSq] - evaluation.FEATURE_KEYS[fromKind | KING_FLAG][fromSq]
+            if fromKind & RED_FLAG:
+                self.redKings -= 1
+            else:
+                self.blackKings -= 1
+        kind, sq = delChecker.kind, delChecker.sq
+        row, col = bitboard.SQUARE_POS[sq]
+        self.board[row][col] = delChecker
+        self.hash ^= transposition.ZOBRIST[kind][sq]
+        self.features += evaluation.FEATURE_KEYS[kind][sq]
+        bit = 1 << sq
+        if kind & RED_FLAG:
+            self.redBits |= bit
+            self.reds += 1
+            if kind & KING_FLAG:
+                self.redKings += 1
+        else:
+            self.blackBits |= bit
+            self.blacks += 1
+            if kind & KING_FLAG:
+                self.blackKings += 1
+        if kind & KING_FLAG:
+            self.kingBits |= bit
+
+
+    def applyMove(self, move):
+        startRow, startCol = bitboard.SQUARE_POS[move.start]
+        counter = self.board[startRow][startCol]
+        kinged = self.movePiece(counter, *bitboard.SQUARE_POS[move.end])
+        deleted = []
+        for over in move.captured: # every hopped counter is removed
+            hopped = self.checkerPresent(*bitboard.SQUARE_POS[over])
+            deleted.append((hopped, self.delPiece(hopped, counter)))
+        return counter, startRow, startCol, kinged, deleted
+
+
+    def undoMove(self, undo):
+        counter, startRow, startCol, kinged, deleted = undo
+        for hopped, regicide in reversed(deleted): # put the hopped counters back in the opposite order to how they went
+            self.restorePiece(hopped, counter, regicide)
+        self.undoMovePiece(counter, startRow, startCol, kinged)
+
+
+    def returnNoCounters(self):
+        return self.reds, self.blacks
+
+
+
+class SearchTimeout(Exception):
+    """Raised from inside the search when the time budget for a move has run out or the search has been cancelled"""
+
+
+
+class Minimax:
+    """
+    A class to represent the minimax algorithm with alpha beta pruning
+
+    ...
+    Attributes
+    -----------
+    maxsize : int
+        represents the highest integer
+    minsize : int
+        represents the lowest integer
+    bestMove : Move
+        The move chosen at the root of the last search
+    table : TranspositionTable
+        Remembers the score, bound and best move of positions already searched, across branches and across turns. None if turned off
+    nodes : int
+        The number of positions visited by the current search
+    deadline : float
+        The time.perf_counter() value at which the current search gives up, None when there is no time limit
+    cancel : threading.Event
+        The cancellation token, setting it from another thread stops the current search as soon as it next checks
+    pv : list
+        The principal variation (the line of best moves) found by the last completed iteration of iterativeDeepening
+    ordering : Boolean
+        When True children are searched captures first, then promotions, killer moves and by the history table, when False only the pv and hash moves are brought forward
+    killers : list
+        For each ply the last two quiet moves that caused a cut off there
+    history : dict
+        For each (start, end) square pair the total depth squared of the cut offs that quiet move has caused
+    evaluation : WeightedEvaluation
+        Scores the positions at the bottom of the search, its weights can be changed to tune the AI
+    batchEvaluation : BatchEvaluation
+        Gives the same scores as evaluation for a whole batch of positions at once with NumPy, None when turned off
+    endgame : EndgameTable
+        The exact result of every position with few enough counters, looked up in place of searching them. None if turned off
+    quiescenceLimit : int
+        The most positions quiescence may visit from each node at the search's depth, 0 or None turns quiescence off
+    quiescenceBudget : int
+        What is left of quiescenceLimit for the node at the search's depth being played out
+    quiescenceNodes : int
+        The positions visited by quiescence in the current search, also counted in nodes
+    quiescenceLimited : int
+        The times in the current search quiescence ran out of budget and evaluated a position with captures still pending
+        
+    Methods
+    -------
+    iterativeDeepening(board, player, timeLimit, maxDepth)
+        Searches to depth 1, 2, 3... until timeLimit seconds have passed or maxDepth is reached and returns the best move and evaluation from the deepest search that finished
+    principalVariation(board, player, depth)
+        Follows the best moves stored in the transposition table from board to find the expected line of play
+    minimaxMain(board, depth, player, alpha, beta)
+        This method is used to be the base before the search branches out, it returns the best move for the player along with its evaluation. The board is searched in place and is left as it was given
+    stopRequested()
+        returns True if the deadline has passed or the search has been cancelled
+    search(board, depth, player, alpha, beta, ply)
+        ply is how many moves from the root the board is. Checks to see if the endgame table has the position, if we are at the lowest depth (0) where quiescence scores it, or if there is a win, therfore no more moves can be made, or if the transposition table already has the answer, otherwise carries on to max or min evaluation and stores the result in the table
+    quiescence(board, player, alpha, beta, ply)
+        Scores a position at the search's depth. If the player has a capture, which they have to take, every capture is searched and so on until a position with no capture pending is reached and evaluated, so the score is not taken in the middle of an exchange. Nothing but captures is searched, and each child is counted as it is made
+    frontierEvaluation(board, player, alpha, beta, hashMove, ply)
+        Used in place of max or min evaluation at depth 1 when batchEvaluation is on: works out every child position from the bit masks without making the moves, scores them all with one call to evaluateBatch and picks the best, so the children need no ordering. Children that end the game or are in the endgame table are scored as search would score them, and children with a capture pending are made and scored by quiescence. Returns the evaluation and the best move
+    maxEvaluation(self, board, depth, player, alpha, beta, hashMove, ply)
+        A method that searches for the maximum evaluation of the possible nodes and updates the max evaluation every time. alpha and beta are used to optimise the evaluation. Each move is made on the board and taken back after it has been searched. Returns the evaluation and the best move
+    minEvaluation(self, board, depth, player, alpha, beta, hashMove, ply)
+        A method that searches for the minimum evaluation of the possible nodes and updates the min evaluation  every time. alpha and beta are used to optimise the evaluation. Returns the evaluation and the best move
+    getChildNode(board, player, hashMove, ply)
+        Gets the valid moves of every counter the player owns, these are the children of the node, in the order they should be searched
+    orderMoves(board, moves, hashMove, ply)
+        Sorts the moves so the ones most likely to cause a cut off come first: the move the last iteration expected at this ply, hashMove (the best move from the transposition table), then the most counters captured, promotions, killer moves and finally the history table
+    recordCutoff(move, depth, ply)
+        Remembers a quiet move that caused a cut off as a killer for the ply and in the history table
+    clearOrdering()
+        Empties the killer moves and history table
+    evaluate(board)
+        This method is used to evaluate the board parameter from red's point of view with the weighted evaluation (material with kings worth more, advancement, back row, centre, mobility and runaways), AI is trying to maximise it, where as the human player will want to minimise it
+    evaluateBatch(red, black, kings)
+        returns the evaluation of every position given by the lists of bit masks red, black and kings
+    winScore(winner, ply)
+        returns the score of a game winner has won ply moves from the root, past any evaluation and nearer 0 the more plies it is from the root, so quicker wins and slower losses are preferred
+    decided(score)
+        returns True if score is a won or lost game, whether the search played it out or found it in the endgame table
+    storedScore(score, ply)
+        returns the score to keep in the transposition table for a node ply moves from the root, a won or lost game counted from the node rather than the root
+    probedScore(score, ply)
+        returns the score a node ply moves from the root takes from a score kept in the transposition table
+    endgameCovers(board)
+        returns True if the endgame table has the board's result
+    endgameScore(board, player, ply)
+        returns the board's score from the endgame table, past any evaluation for a win or loss and nearer 0 the more plies it is from the root, so quicker wins and slower losses are preferred
+    tableScore(red, black, kings, player, ply)
+        the same as endgameScore for the position given by the bit masks red, black and kings
+    """
+    def __init__(self, tableBytes=32 * 1024 * 1024, weights=None, batch=False, endgamePath=None, quiescenceLimit=QUIESCENCE_LIMIT):
+        self.maxsize = sys.maxsize
+        self.minsize = -sys.maxsize -1
+        self.bestMove = None
+        self.table = None
+        if tableBytes: # a table size of 0 or None turns the transposition table off
+            self.table = transposition.TranspositionTable(tableBytes)
+        self.nodes = 0
+        self.deadline = None
+        self.cancel = threading.Event()
+        self.pv = []
+        self.ordering = True
+        self.evaluation = evaluation.WeightedEvaluation(weights) # weights left out keep their defaults
+        self.batchEvaluation = None
+        if batch == True: # needs NumPy, so it is only imported when it is asked for
+            import batcheval
+            self.batchEvaluation = batcheval.BatchEvaluation(weights)
+        self.endgame = None
+        if endgamePath != None: # memory mapped, so nothing is read until a position is looked up
+            self.endgame = endgame.EndgameTable(endgamePath)
+        self.quiescenceLimit = quiescenceLimit
+        self.quiescenceBudget = 0
+        self.quiescenceNodes = 0
+        self.quiescenceLimited = 0
+        self.clearOrdering()
+
+    def iterativeDeepening(self, board, player, timeLimit=0.2, maxDepth=None):
+        start = time.perf_counter()
+        self.pv = []
+        self.clearOrdering() # killers and history are kept between iterations but not between moves
+        bestMove, bestScore = None, None
+        depth = 1
+        while maxDepth == None or depth <= maxDepth:
+            if depth > 1: # depth 1 always finishes so there is always a move to play
+                self.deadline = start + timeLimit
+            try:
+                move, score = self.minimaxMain(board, depth, player, self.minsize, self.maxsize)
+            except SearchTimeout: # this iteration did not finish, keep the last one that did
+                break
+            finally:
+                self.deadline = None
+            bestMove, bestScore = move, score
+            if move == None or self.decided(score): # no moves or the game is decided, searching deeper will not change anything
+                break
+            if self.endgameCovers(board): # every reply was looked up, so depth 1 is already exact
+                break
+            self.pv = self.principalVariation(board, player, depth)
+            if time.perf_counter() - start > timeLimit / 2: # the next depth takes several times longer than this one, so it would not finish in time
+                break
+            depth += 1
+        return bestMove, bestScore
+
+
+    def principalVariation(self, board, player, depth):
+        pv = [self.bestMove]
+        undos = [board.applyMove(self.bestMove)]
+        player = not player
+        while self.table != None and len(pv) < depth:
+            entry = self.table.probe(board.hash ^ transposition.sideKey(player))
+            if entry == None or entry[4] == None or entry[4] not in board.generateMoves(player):
+                break
+            pv.append(entry[4])
+            undos.append(board.applyMove(entry[4]))
+            player = not player
+        for undo in reversed(undos):
+            board.undoMove(undo)
+        return pv
+
+
+    def minimaxMain(self, board, depth, player, alpha, beta): # player = True if AI therfore finding the max, player = False if human therefore finding the min
+        self.bestMove = None
+        self.nodes = 0
+        self.quiescenceNodes = 0
+        self.quiescenceLimited = 0
+        score = self.search(board, depth, player, alpha, beta, 0) # board is searched in place and left as it was found
+        return self.bestMove, score # returns the best move for the player and its minimax evaluation
+
+
+    def stopRequested(self):
+        return (self.deadline != None and time.perf_counter() > self.deadline) or self.cancel.is_set()
+
+
+    def search(self, board, depth, player, alpha, beta, ply=0):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and self.stopRequested(): # only look at the clock and the cancellation token every 1024 nodes
+            raise SearchTimeout()
+        if ply > 0 and self.endgameCovers(board): # the result is known exactly, so there is nothing to search. The root is still searched to find a move
+            return self.endgameScore(board, player, ply)
+        if board.checkWinner()!= None: # if game is won so is at a bottom leaf
+            return self.winScore(board.checkWinner(), ply)
+        if depth == 0: # if we are at the last depth of the tree
+            if self.quiescenceLimit:
+                self.quiescenceBudget = self.quiescenceLimit
+                return self.quiescence(board, player, alpha, beta, ply)
+            return self.evaluate(board)
+        key = board.hash ^ transposition.sideKey(player)
+        hashMove = None
+        if self.table != None:
+            entry = self.table.probe(key)
+            if entry != None:
+                storedKey, storedDepth, storedScore, bound, hashMove = entry
+                if storedDepth >= depth and ply > 0: # a search at least this deep has been done before, use its score if it settles this node
+                    storedScore = self.probedScore(storedScore, ply)
+                    if bound == transposition.EXACT:
+                        return storedScore
+                    if bound == transposition.LOWER and storedScore >= beta:
+                        return storedScore
+                    if bound == transposition.UPPER and storedScore <= alpha:
+                        return storedScore
+        if depth == 1 and self.batchEvaluation != None: # every child is a leaf, so they can all be scored at once
+            bestScore, bestMove = self.frontierEvaluation(board, player, alpha, beta, hashMove, ply)
+        elif player == True: # if this is an AI player
+            bestScore, bestMove = self.maxEvaluation(board, depth, player, alpha, beta, hashMove, ply)
+        else:
+            bestScore, bestMove = self.minEvaluation(board, depth, player, alpha, beta, hashMove, ply)
+        if self.table != None:
+            if bestScore <= alpha: # nothing got above alpha, so the real value could be even lower
+                bound = transposition.UPPER
+            elif bestScore >= beta: # the search was cut off, so the real value could be even higher
+                bound = transposition.LOWER
+            else:
+                bound = transposition.EXACT
+            self.table.store(key, depth, self.storedScore(bestScore, ply), bound, bestMove)
+        if ply == 0: # only the root needs to know which move was best
+            self.bestMove = bestMove
+        return bestScore
+
+
+    def quiescence(self, board, player, alpha, beta, ply):
+        if board.canCapture(player) == False: # a quiet position, most are, and finding that out needs no moves generating
+            return self.evaluate(board)
+        moves = board.generateMoves(player) # captures are forced, so these are all captures
+        if self.quiescenceBudget < len(moves): # not enough left to look at every capture, the exchange is left unfinished
+            self.quiescenceLimited += 1
+            return self.evaluate(board)
+        self.quiescenceBudget -= len(moves)
+        moves.sort(key=lambda move: len(move.captured), reverse=True) # the longest hops first, they are the likeliest to cut off
+        bestScore = self.minsize if player == True else self.maxsize
+        for move in moves:
+            self.nodes += 1
+            self.quiescenceNodes += 1
+            if self.nodes & 1023 == 0 and self.stopRequested():
+                raise SearchTimeout()
+            undo = board.applyMove(move)
+            try:
+                if self.endgameCovers(board):
+                    score = self.endgameScore(board, not player, ply+1)
+                elif board.checkWinner() != None:
+                    score = self.winScore(board.checkWinner(), ply+1)
+                else:
+                    score = self.quiescence(board, not player, alpha, beta, ply+1)
+            finally:
+                board.undoMove(undo)
+            if player == True:
+                bestScore = max(bestScore, score)
+                alpha = max(alpha, score)
+            else:
+                bestScore = min(bestScore, score)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+        return bestScore
+
+
+    def frontierEvaluation(self, board, player, alpha, beta, hashMove=None, ply=0):
+        moves = board.generateMoves(player) # not ordered, every child is scored whatever order they are in
+        if not moves:
+            return self.winScore("black" if player == True else "red", ply), None
+        scores = [None] * len(moves)
+        reds, blacks, kings = [], [], []
+        batched = [] # the children scored by evaluateBatch
+        pending = [] # the children where the reply is a capture
+        for index, move in enumerate(moves): # the children are never made on the board, only their bit masks are worked out
+            if player == True:
+                red, black, king = bitboard.afterMove(board.redBits, board.blackBits, board.kingBits, move)
+                capture = self.quiescenceLimit and bitboard.jumpers(black, red, king, bitboard.DOWN, ~(red | black) & bitboard.FULL)
+            else:
+                black, red, king = bitboard.afterMove(board.blackBits, board.redBits, board.kingBits, move)
+                capture = self.quiescenceLimit and bitboard.jumpers(red, black, king, bitboard.UP, ~(red | black) & bitboard.FULL)
+            if red == 0 or black == 0: # the move wins the game
+                scores[index] = self.winScore("red" if black == 0 else "black", ply+1)
+            elif self.endgame != None and self.endgame.covers(red.bit_count() + black.bit_count()): # looked up the same as search would
+                scores[index] = self.tableScore(red, black, king, not player, ply+1)
+            elif capture:
+                pending.append(index)
+            else:
+                batched.append(index)
+                reds.append(red)
+                blacks.append(black)
+                kings.append(king)
+        before = self.nodes
+        self.nodes += len(moves) # every child is a position visited, the same as if each had been searched to depth 0
+        if (before ^ self.nodes) >> 10 and self.stopRequested(): # the count has passed a multiple of 1024
+            raise SearchTimeout()
+        if batched:
+            for index, score in zip(batched, self.evaluateBatch(reds, blacks, kings)):
+                scores[index] = score
+        for index in pending: # a score taken in the middle of an exchange is misleading, so they are played out instead
+            undo = board.applyMove(moves[index])
+            try:
+                self.quiescenceBudget = self.quiescenceLimit
+                scores[index] = self.quiescence(board, not player, alpha, beta, ply+1)
+            finally:
+                board.undoMove(undo)
+        bestScore = max(scores) if player == True else min(scores) # no child was cut off, so this is exact unless quiescence bounded a child's score
+        bestMove = moves[scores.index(bestScore)]
+        if (player == True and bestScore >= beta) or (player == False and bestScore <= alpha): # where max or min evaluation would have cut off
+            self.recordCutoff(bestMove, 1, ply)
+        return bestScore, bestMove
+
+
+    def maxEvaluation(self, board, depth, player, alpha, beta, hashMove=None, ply=0):
+        bestScore = self.minsize # sets to the smallest integer as this is the lowest max it can be to start with
+        bestMove = None
+        moves = self.getChildNode(board, player, hashMove, ply)
+        if not moves: # a player with no move has lost, scored like any other win so quicker ones are still preferred
+            return self.winScore("black", ply), None
+        # for each child of the node
+        for move in moves: # for each valid move, make it on the board, recursively call and take it back
+            undo = board.applyMove(move)
+            try:
+                maxEval = self.search(board, depth-1, False, alpha, beta, ply+1) # False as going to Human player
+            finally: # the move is taken back even if the search is stopped part way through
+                board.undoMove(undo)
+            if maxEval > bestScore: # find the max of best score compared to maxEval
+                bestScore = maxEval
+                bestMove = move # best move is updated to move if evaluation is the best
+            if maxEval > alpha: #alpha-beta pruning -  find the max value of alpha compared to the evaluation
+                alpha = maxEval
+            if alpha >= beta: # stop exploring
+                self.recordCutoff(move, depth, ply)
+                break
+        return bestScore, bestMove # return the evaluation and the move that gave it
+        
+
+    def minEvaluation(self, board, depth, player, alpha, beta, hashMove=None, ply=0):
+        bestScore = self.maxsize # sets to the largest integer as this is the highest min it can be to start with
+        # for each child of the node
+        bestMove = None
+        moves = self.getChildNode(board, player, hashMove, ply)
+        if not moves:
+            return self.winScore("red", ply), None
+        for move in moves:
+            undo = board.applyMove(move)
+            try:
+                minEval = self.search(board, depth-1, True, alpha, beta, ply+1) #True as going to AI player
+            finally:
+                board.undoMove(undo)
+            if minEval < bestScore:# find the min of best score compared to minEval
+                bestScore = minEval
+                bestMove = move  #best move is updated to move if evaluation is the best
+            if minEval < beta:
+                beta = minEval
+            if alpha >= beta: # stop exploring
+                self.recordCutoff(move, depth, ply)
+                break
+        return bestScore, bestMove # return the evaluation and the move that gave it
+
+
+    def getChildNode(self, board, player, hashMove=None, ply=0): # the legal moves for every counter the player owns
+        return self.orderMoves(board, board.generateMoves(player), hashMove, ply)
+
+
+    def orderMoves(self, board, moves, hashMove=None, ply=0):
+        pvMove = None
+        if ply < len(self.pv):
+            pvMove = self.pv[ply]
+        if self.ordering == False: # only the moves remembered from earlier searches are brought forward
+            for first in (hashMove, pvMove):
+                if first != None and first in moves:
+                    moves.remove(first)
+                    moves.insert(0, first)
+            return moves
+        killers = self.killers[ply] if ply < len(self.killers) else (None, None)
+        history = self.history
+        def rank(move): # compared left to right, the largest rank is searched first
+            killer = 2 if move == killers[0] else 1 if move == killers[1] else 0
+            return (move == pvMove, move == hashMove, len(move.captured), move.promotion, killer, history.get((move.start, move.end), 0))
+        moves.sort(key=rank, reverse=True)
+        return moves
+
+
+    def recordCutoff(self, move, depth, ply): # a quiet move that caused a cut off is likely to do so again in sibling positions
+        if move.captured: # captures are already searched early
+            return
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (move.start, move.end)
+        self.history[key] = self.history.get(key, 0) + depth * depth # cut offs near the root save the most work
+
+
+    def clearOrdering(self):
+        self.killers = []
+        self.history = {}
+
+
+    def evaluate(self, board): # the board keeps its features up to date as counters move, so this does not scan the board
+        return self.evaluation(board)
+
+
+    def evaluateBatch(self, red, black, kings):
+        return self.batchEvaluation(red, black, kings)
+
+
+    def winScore(self, winner, ply):
+        score = endgame.WIN_SCORE - ply # the same scale as the endgame table, so a win on the board is never worth less than one looked up
+        return score if winner == "red" else -score
+
+
+    def decided(self, score):
+        return abs(score) >= endgame.DECIDED
+
+
+    def storedScore(self, score, ply): # a win is kept in the table as plies from the position, it can be reached again at another ply or on a later turn
+        if self.decided(score):
+            return score + ply if score > 0 else score - ply
+        return score
+
+
+    def probedScore(self, score, ply): # the reverse of storedScore, back to plies from the root
+        if self.decided(score):
+            return score - ply if score > 0 else score + ply
+        return score
+
+
+    def endgameCovers(self, board):
+        return self.endgame != None and board.reds > 0 and board.blacks > 0 and self.endgame.covers(board.reds + board.blacks)
+
+
+    def endgameScore(self, board, player, ply):
+        return self.tableScore(board.redBits, board.blackBits, board.kingBits, player, ply)
+
+
+    def tableScore(self, red, black, kings, player, ply):
+        outcome, distance = self.endgame.probe(red, black, kings, player)
+        if outcome == endgame.DRAW:
+            return 0
+        score = endgame.WIN_SCORE - ply - distance # for the side to move
+        if outcome == endgame.LOSS:
+            score = -score
+        return score if player == True else -score
+
+
+
+class Play:
+    """
+    A class to represent the overall game the players are playing
+
+    ...
+    Attributes
+    -----------
+    currentPlayer : string
+        the colour of the current player's counters
+    checkersBoard : Board() object
+        Used as the board that the players are playing on in this and related class/s
+    checkerSelected: Boolean
+        To show that a player has already selected a counter throught the GUI
+    pickedChecker : None/Counter()
+        To show that a sqaure has been clicked on to be moved to
+    hops : list
+        The squares clicked on the way to the end of a capture, to pick between captures from the same start to the same end
+    record : GameRecord
+        Every move made so far in the game and the AI's score for each of its own
+        
+    Methods
+    -------
+    chosen(row, col)
+        Allows the user to select a valid counter and move it to a correct place
+    move(row, col)
+        Returns True if the user's counter can be moved to the selected board place, and makes that legal move. Returns None if the place is part of the way through a capture, or the end of more than one, and the counter stays selected until the rest of the capture is clicked
+    landingsAfter(move, hops)
+        Returns the squares the move lands on after the squares in hops, None if hops are not the first squares it lands on
+    showLandings(moves, ends)
+        Sets the valid moves shown to the next square each of the moves lands on and, if ends is True, where each ends
+    changePlayer()
+        Changes turns of the players
+    updateBoard(move, score)
+        Used after an AI player takes its turn to make the move they found has the best evaluation on the board, score is that evaluation. The players are then switched.
+    """
+    def __init__(self):
+        self.currentPlayer = "black"
+        self.checkersBoard = Board()
+        self.checkerSelected = False
+        self.pickedChecker = None
+        self.hops = []
+        self.record = gamerecord.GameRecord()
+
+    def chosen(self, row, col):
+        if self.checkerSelected == False: # if a counter is yet to be selected, identify it with the row and col parameter
+            selectedChecker = self.checkersBoard.checkerPresent(row, col)
+            if selectedChecker != None and selectedChecker.colour == self.currentPlayer: # if there is the player's counter present
+                self.checkerSelected = True # then select this counter
+                self.pickedChecker = selectedChecker
+                self.hops = []
+                v, d = self.checkersBoard.checkValidMoves(self.pickedChecker) #identify the valid moves
+        else: # when a counter has been selected
+            moved = self.move(row, col)
+            if moved == False:  # see if the counter has any valid moves so it can move
+                self.checkerSelected = False # if it can't then we reselect our checker by recursively running this method
+                self.chosen(row, col)
+            elif moved == True:
+                self.changePlayer() # opposition has moved thier piece successfully, so rotate the players
+
+
+    def move(self, row, col):
+        sq = bitboard.posToSquare(row, col)
+        if bitboard.squareToPos(sq) != (row, col): # a light square, nothing can move there
+            return False
+        finishing = [] # the moves ending on the square
+        through = [] # the moves landing on the square part way through
+        for move in self.checkersBoard.generateMoves(self.currentPlayer == "red"): # the same legal moves the AI plays by, so a king's capture can end where it started
+            if move.start != self.pickedChecker.sq:
+                continue
+            after = self.landingsAfter(move, self.hops)
+            if after == None:
+                continue
+            if after[-1] == sq:
+                finishing.append(move)
+            elif after[0] == sq:
+                through.append(move)
+        if len(finishing) > 1: # a capture landing on the squares clicked and nothing else is the one asked for
+            finishing = [move for move in finishing if self.landingsAfter(move, self.hops) == [sq]] or finishing
+        if len(finishing) == 1:
+            self.checkersBoard.applyMove(finishing[0]) # moves the counter, removes every counter it hopped and crowns it
+            self.record.addMove(finishing[0])
+            return True
+        if len(finishing) > 1:
+            print("More than one capture ends there, click a square the one you want lands on first")
+            self.showLandings(finishing, False)
+            return None
+        if len(through) > 0:
+            self.hops.append(sq)
+            self.showLandings(through, True)
+            return None
+        return False
+
+
+    def landingsAfter(self, move, hops):
+        landings = bitboard.movePath(move)[1:]
+        if len(hops) >= len(landings) or landings[:len(hops)] != hops: # the squares clicked on the way have to be the first it lands on, in order
+            return None
+        return landings[len(hops):]
+
+
+    def showLandings(self, moves, ends):
+        self.checkersBoard.validMoves = []
+        for move in moves:
+            after = self.landingsAfter(move, self.hops)
+            for sq in (after[0], after[-1]) if ends == True else after[:1]:
+                pos = list(bitboard.squareToPos(sq))
+                if pos not in self.checkersBoard.validMoves:
+                    self.checkersBoard.validMoves.append(pos)
+            
+
+    def changePlayer(self):
+        if self.currentPlayer == "red":
+            self.currentPlayer = "black"
+        else:
+            self.currentPlayer = "red"
+        self.checkersBoard.validMoves = []
+        self.checkersBoard.deletedCheckers = []
+        self.hops = []
+        
+
+    def updateBoard(self, move, score=None):
+        self.checkersBoard.applyMove(move) # makes the AI's move on the board
+        self.record.addMove(move, score)
+        self.changePlayer()
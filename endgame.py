@@ -0,0 +1,332 @@
+import argparse
+import itertools
+import mmap
+import struct
+import sys
+import time
+from math import comb
+
+import bitboard
+
+# An endgame table holds the result of every position with at most maxPieces counters, worked out backwards from the
+# positions that are already over (retrograde analysis). Positions are always stored with the side to move as red:
+# turning the board round (square sq becomes 31 - sq, which is reversing the 32 bits) swaps the colours and the
+# direction the men move in, so a black to move position is looked up as its turned round red to move twin.
+#
+# Positions with the same numbers of men and kings on each side share a signature, (own men, own kings, opposition
+# men, opposition kings) from the side to move's point of view, and each signature is one block of the file with a byte
+# for every way of placing its counters. Men can never stand on their own crown row, so the side to move's men (which
+# move up) are placed on squares 4 to 31 and the opposition men on 0 to 27, then the kings go on the squares left. Each
+# group is numbered in colex order, so a position's place in its block is found with a few table lookups.
+#
+# Each byte is 0 for a draw, 1 to 127 for a win for the side to move in that many plies and 128 + n for a loss in n
+# plies. Every counter lost (or having no move) ends the game, so a loss in 0 is a position with no moves.
+MAGIC = b"CKEG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI") # magic, version, maxPieces, number of signatures
+SIGNATURE = struct.Struct("<4BQI") # own men, own kings, opposition men, opposition kings, file offset, positions
+DRAW, WIN, LOSS = 0, 1, 2
+WIN_SCORE = 1000000 # what the search scores a win, found in the table or played out, less a point for every ply until the win, far past any evaluation
+DECIDED = WIN_SCORE // 2 # a score at least this far from 0 is a won or lost game, however many plies away the end is
+MAX_DISTANCE = 127
+MEN_SQUARES = 28 # the squares a man can stand on, all but its own crown row
+OWN_MEN_FIRST = 4 # the side to move's men are on squares 4 to 31, so their square minus this is their place among them
+COMB = [[comb(n, k) for k in range(13)] for n in range(33)]
+_REVERSED_BYTES = bytes(int(format(byte, "08b")[::-1], 2) for byte in range(256))
+
+
+def turnRound(bits):
+    """The bit mask of the same squares with the board turned round, square sq becoming square 31 - sq"""
+    return int.from_bytes(bits.to_bytes(4, "little").translate(_REVERSED_BYTES), "big")
+
+
+def signatureOf(own, opp, kings):
+    return ((own & ~kings).bit_count(), (own & kings).bit_count(), (opp & ~kings).bit_count(), (opp & kings).bit_count())
+
+
+def signatureSize(signature):
+    ownMen, ownKings, oppMen, oppKings = signature
+    free = 32 - ownMen - oppMen
+    return COMB[MEN_SQUARES][ownMen] * COMB[MEN_SQUARES][oppMen] * COMB[free][ownKings] * COMB[free - ownKings][oppKings]
+
+
+def _colex(bits, shift=0, blocked=0):
+    # the colex number of the squares in bits, each square counted by its place among the squares not in blocked
+    rank = 0
+    count = 1
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        rank += COMB[sq - shift - (blocked & (low - 1)).bit_count()][count]
+        count += 1
+        bits ^= low
+    return rank
+
+
+def positionIndex(signature, own, opp, kings):
+    """The place of a position, the side to move owning own and moving up the board, in its signature's block"""
+    ownMen, ownKings, oppMen, oppKings = signature
+    menBits = (own | opp) & ~kings
+    free = 32 - ownMen - oppMen
+    index = _colex(own & ~kings, OWN_MEN_FIRST) * COMB[MEN_SQUARES][oppMen] + _colex(opp & ~kings)
+    index = index * COMB[free][ownKings] + _colex(own & kings, 0, menBits)
+    return index * COMB[free - ownKings][oppKings] + _colex(opp & kings, 0, menBits | (own & kings))
+
+
+def signatures(maxPieces):
+    """Every signature with both sides on the board and at most maxPieces counters, in the order they are solved in"""
+    found = []
+    for total in range(2, maxPieces + 1):
+        for ownMen, ownKings, oppMen in itertools.product(range(total + 1), repeat=3):
+            oppKings = total - ownMen - ownKings - oppMen
+            if oppKings >= 0 and ownMen + ownKings > 0 and oppMen + oppKings > 0:
+                found.append((ownMen, ownKings, oppMen, oppKings))
+    # a capture leaves fewer counters and a crowning fewer men, so everything a position can move to is solved first
+    return sorted(found, key=lambda signature: (sum(signature), signature[0] + signature[2]))
+
+
+def encodeValue(outcome, distance):
+    if outcome == DRAW:
+        return 0
+    if distance > MAX_DISTANCE:
+        raise ValueError(f"a distance of {distance} plies does not fit in a byte")
+    return distance if outcome == WIN else 128 + distance
+
+
+def decodeValue(value):
+    """The (outcome, distance) stored in a byte"""
+    if value == 0:
+        return DRAW, 0
+    if value < 128:
+        return WIN, value
+    return LOSS, value - 128
+
+
+def positions(signature):
+    """Every (own, opp, kings) position of a signature, the side to move owning own"""
+    ownMen, ownKings, oppMen, oppKings = signature
+    for ownSquares in itertools.combinations(range(OWN_MEN_FIRST, 32), ownMen):
+        ownMenBits = sum(1 << sq for sq in ownSquares)
+        for oppSquares in itertools.combinations(range(MEN_SQUARES), oppMen):
+            oppMenBits = sum(1 << sq for sq in oppSquares)
+            if ownMenBits & oppMenBits:
+                continue
+            free = [sq for sq in range(32) if not ((ownMenBits | oppMenBits) >> sq) & 1]
+            for ownKingSquares in itertools.combinations(free, ownKings):
+                ownKingBits = sum(1 << sq for sq in ownKingSquares)
+                for oppKingSquares in itertools.combinations([sq for sq in free if sq not in ownKingSquares], oppKings):
+                    oppKingBits = sum(1 << sq for sq in oppKingSquares)
+                    yield ownMenBits | ownKingBits, oppMenBits | oppKingBits, ownKingBits | oppKingBits
+
+
+def _unmoves(own, opp, kings):
+    # The positions one quiet opposition move before this one that stay in the same signature: an opposition counter
+    # steps back the way it came, a man only from the row behind it. The opposition must have had nothing to hop there,
+    # or the quiet move would not have been allowed. Returned turned round, so the opposition is the side to move.
+    empty = ~(own | opp) & bitboard.FULL
+    previous = []
+    for sq in bitboard.iterSquares(opp):
+        king = (kings >> sq) & 1
+        for direction in bitboard.PIECE_DIRECTIONS[bitboard.DOWN][king]:
+            backIndex = bitboard.DIRECTION_INDEX[(-bitboard.DIRECTIONS[direction][0], -bitboard.DIRECTIONS[direction][1])]
+            before = bitboard.NEIGHBOURS[sq][backIndex]
+            if before != None and (empty >> before) & 1:
+                moved = (1 << sq) | (1 << before)
+                beforeOpp = opp ^ moved
+                beforeKings = kings ^ moved if king else kings
+                if not bitboard.jumpers(beforeOpp, own, beforeKings, bitboard.DOWN, ~(beforeOpp | own) & bitboard.FULL):
+                    previous.append((turnRound(beforeOpp), turnRound(own), turnRound(beforeKings)))
+    return previous
+
+
+def _solve(group, solved):
+    # Solves a signature together with its turned round twin, as quiet moves go from one to the other. Every position
+    # is first scored from the moves that leave the group (captures and crownings, whose results are already known),
+    # then results are handed back to the positions before them in order of distance, so the first win found for a
+    # position is its quickest and a loss is only settled once every move has been found to lose.
+    offsets, total = {}, 0
+    for signature in group:
+        offsets[signature] = total
+        total += signatureSize(signature)
+    remaining = bytearray(total) # quiet moves not yet known to lose
+    longest = bytearray(total) # the longest win for the opposition among the moves known so far
+    saved = bytearray(total) # 1 when some move draws or wins, so the position cannot be lost
+    done = bytearray(total)
+    values = bytearray(total)
+    buckets = [[] for distance in range(MAX_DISTANCE + 2)]
+
+    def lookup(own, opp, kings):
+        if not own:
+            return LOSS, 0
+        signature = signatureOf(own, opp, kings)
+        return decodeValue(solved[signature][positionIndex(signature, own, opp, kings)])
+
+    for signature in group:
+        base = offsets[signature]
+        for own, opp, kings in positions(signature):
+            place = base + positionIndex(signature, own, opp, kings)
+            moves = bitboard.legalMoves(own, opp, kings, bitboard.UP)
+            quiet, quickest, slowest, draws = 0, None, 0, False
+            for move in moves:
+                if not move.captured and not move.promotion:
+                    quiet += 1
+                    continue
+                after, oppAfter, kingsAfter = bitboard.afterMove(own, opp, kings, move)
+                outcome, distance = lookup(turnRound(oppAfter), turnRound(after), turnRound(kingsAfter))
+                if outcome == LOSS:
+                    quickest = distance if quickest == None else min(quickest, distance)
+                elif outcome == WIN:
+                    slowest = max(slowest, distance)
+                else:
+                    draws = True
+            remaining[place] = quiet
+            longest[place] = slowest
+            saved[place] = draws or quickest != None
+            if not moves:
+                buckets[0].append((place, LOSS, own, opp, kings))
+            elif quickest != None:
+                buckets[quickest + 1].append((place, WIN, own, opp, kings))
+            elif quiet == 0 and draws == False: # every move loses
+                buckets[slowest + 1].append((place, LOSS, own, opp, kings))
+
+    for distance, bucket in enumerate(buckets[:MAX_DISTANCE + 1]):
+        for place, outcome, own, opp, kings in bucket:
+            if done[place]:
+                continue
+            done[place] = 1
+            values[place] = encodeValue(outcome, distance)
+            for before in _unmoves(own, opp, kings):
+                beforeSignature = signatureOf(*before)
+                beforePlace = offsets[beforeSignature] + positionIndex(beforeSignature, *before)
+                if done[beforePlace]:
+                    continue
+                if outcome == LOSS: # the position before can move here and win
+                    saved[beforePlace] = 1
+                    buckets[min(distance + 1, MAX_DISTANCE + 1)].append((beforePlace, WIN) + before)
+                else:
+                    remaining[beforePlace] -= 1
+                    longest[beforePlace] = max(longest[beforePlace], distance)
+                    if remaining[beforePlace] == 0 and saved[beforePlace] == 0:
+                        buckets[min(longest[beforePlace] + 1, MAX_DISTANCE + 1)].append((beforePlace, LOSS) + before)
+        bucket.clear()
+    if any(not done[place] for place, outcome, *position in buckets[MAX_DISTANCE + 1]):
+        raise ValueError(f"some results are more than {MAX_DISTANCE} plies away, too far for one byte")
+    return {signature: values[offsets[signature]:offsets[signature] + signatureSize(signature)] for signature in group}
+
+
+def generate(maxPieces, path, report=None):
+    """
+    Solves every position with at most maxPieces counters and writes the table to path, passing (signature, positions,
+    seconds) to report as each signature is finished. Returns the number of positions written.
+    """
+    solved = {}
+    for signature in signatures(maxPieces):
+        if signature in solved:
+            continue
+        twin = (signature[2], signature[3], signature[0], signature[1])
+        group = (signature,) if twin == signature else (signature, twin)
+        start = time.perf_counter()
+        solved.update(_solve(group, solved))
+        if report != None:
+            for member in group:
+                report(member, signatureSize(member), (time.perf_counter() - start) / len(group))
+    order = signatures(maxPieces)
+    offset = HEADER.size + SIGNATURE.size * len(order)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, maxPieces, len(order)))
+        for signature in order:
+            file.write(SIGNATURE.pack(*signature, offset, len(solved[signature])))
+            offset += len(solved[signature])
+        for signature in order:
+            file.write(solved[signature])
+    return sum(len(values) for values in solved.values())
+
+
+class EndgameTable:
+    """
+    A class to look positions up in an endgame table file made by generate(). The file is memory mapped rather than
+    read, so only the pages that are probed are ever loaded and every process that opens the same file shares them.
+
+    ...
+    Attributes
+    -----------
+    path : string
+        The file the table was opened from
+    maxPieces : int
+        Positions with this many counters or fewer are in the table
+    blocks : dict
+        The (file offset, positions) of each signature's block
+    probes : int
+        The number of positions looked up
+
+    Methods
+    -------
+    covers(pieces)
+        returns True if positions with that many counters are in the table
+    probe(redBits, blackBits, kingBits, redToMove)
+        returns the (outcome, distance in plies) of the position for the side to move, outcome one of WIN, LOSS and DRAW
+    close()
+        unmaps the file
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) # the mapping stays open after the file is closed
+        magic, version, self.maxPieces, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a version " + str(VERSION) + " endgame table")
+        self.blocks = {}
+        for number in range(count):
+            *signature, offset, size = SIGNATURE.unpack_from(self.data, HEADER.size + number * SIGNATURE.size)
+            self.blocks[tuple(signature)] = (offset, size)
+        self.probes = 0
+
+    def covers(self, pieces):
+        return pieces <= self.maxPieces
+
+    def probe(self, redBits, blackBits, kingBits, redToMove):
+        if redToMove == True:
+            own, opp, kings = redBits, blackBits, kingBits
+        else: # turned round, black becomes the side moving up the board
+            own, opp, kings = turnRound(blackBits), turnRound(redBits), turnRound(kingBits)
+        if not own:
+            return LOSS, 0
+        signature = signatureOf(own, opp, kings)
+        offset, size = self.blocks[signature]
+        self.probes += 1
+        return decodeValue(self.data[offset + positionIndex(signature, own, opp, kings)])
+
+    def close(self):
+        self.data.close()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Builds an endgame table of every position with a few counters left, or looks a position up in one")
+    parser.add_argument("path", help="the table file to write, or to read with --position")
+    parser.add_argument("--pieces", type=int, default=4, help="the most counters on the board, both sides together, a table covers. Every extra counter makes it around 25 times bigger and slower to build")
+    parser.add_argument("--position", default=None, help="a FEN-like position (see perft.py) to look up instead of building")
+    args = parser.parse_args(arguments)
+    if args.position != None:
+        from perft import parsePosition
+        board, player = parsePosition(args.position)
+        table = EndgameTable(args.path)
+        if not table.covers(board.reds + board.blacks):
+            print(f"the table only covers {table.maxPieces} counters")
+            return 1
+        outcome, distance = table.probe(board.redBits, board.blackBits, board.kingBits, player)
+        print(("draw", "win in " + str(distance) + " plies", "loss in " + str(distance) + " plies")[outcome] + " for " + ("red" if player == True else "black"))
+        return 0
+    if not 2 <= args.pieces <= 12:
+        parser.error("--pieces has to be between 2 and 12")
+    start = time.perf_counter()
+
+    def report(signature, size, seconds):
+        print(f"own {signature[0]} men {signature[1]} kings, opposition {signature[2]} men {signature[3]} kings  {size:10d} positions  {seconds:7.2f}s")
+
+    total = generate(args.pieces, args.path, report)
+    print(f"{total} positions in {time.perf_counter() - start:.1f}s written to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import json
+
+import bitboard
+
+# The features a board keeps up to date as counters move, each counted for red minus black:
+#   men          counters that are not kings
+#   kings        kings
+#   advancement  rows each man has moved up the board from its own back row
+#   backRow      men still guarding their own back row, stopping the other side from crowning
+#   centre       counters on the eight squares of the two middle rows
+# A counter's contribution to all of them is packed into one integer, FIELD_BITS bits a feature, so the board can add and
+# take away a whole counter's worth of features with one addition, the same way it xors Zobrist keys into its hash.
+FEATURES = ("men", "kings", "advancement", "backRow", "centre")
+FIELD_BITS = 16
+_FIELD_MASK = (1 << FIELD_BITS) - 1
+_FIELD_BIAS = 1 << (FIELD_BITS - 1) # fields can be negative, so each is read back shifted up by this much
+_PACKED_BIAS = sum(_FIELD_BIAS << (FIELD_BITS * index) for index in range(len(FEATURES)))
+CENTRE = 0x000FF000 # squares 12 to 19, rows 3 and 4
+
+
+def _pack(values):
+    return sum(value << (FIELD_BITS * index) for index, value in enumerate(values))
+
+
+def unpack(packed):
+    """Turns a packed feature total back into a dictionary of each feature's value"""
+    packed += _PACKED_BIAS
+    return {name: ((packed >> (FIELD_BITS * index)) & _FIELD_MASK) - _FIELD_BIAS for index, name in enumerate(FEATURES)}
+
+
+def _buildFeatureKeys():
+    keys = []
+    for colour, king in (("black", False), ("black", True), ("red", False), ("red", True)): # the same order as ZOBRIST
+        sign = 1 if colour == "red" else -1
+        kindKeys = []
+        for sq in range(32):
+            row = sq >> 2
+            advanced = 7 - row if colour == "red" else row # rows moved from its own back row
+            men, kings, advancement, backRow = 0, 0, 0, 0
+            if king:
+                kings = 1
+            else:
+                men = 1
+                advancement = advanced
+                backRow = 1 if advanced == 0 else 0
+            centre = (CENTRE >> sq) & 1
+            kindKeys.append(_pack([sign * men, sign * kings, sign * advancement, sign * backRow, sign * centre]))
+        keys.append(kindKeys)
+    return keys
+
+FEATURE_KEYS = _buildFeatureKeys()
+
+
+def _buildRunawayMasks():
+    # for a man on each square, the squares ahead of it an opposition counter would have to be on to stop it reaching
+    # the crown row: every square in the rows in front of it no further sideways than it is forwards. Only men within
+    # RUNAWAY_ROWS rows of crowning are looked at.
+    masks = {}
+    for forward in (bitboard.DOWN, bitboard.UP):
+        cones = []
+        for sq in range(32):
+            row, col = bitboard.squareToPos(sq)
+            cone = 0
+            for other in range(32):
+                otherRow, otherCol = bitboard.squareToPos(other)
+                ahead = (otherRow - row) * forward
+                if ahead > 0 and abs(otherCol - col) <= ahead:
+                    cone |= 1 << other
+            cones.append(cone)
+        masks[forward] = tuple(cones)
+    return masks
+
+RUNAWAY_ROWS = 3
+RUNAWAY_CONES = _buildRunawayMasks()
+# the RUNAWAY_ROWS rows before each side's crown row
+RUNAWAY_ZONE = {forward: sum(1 << sq for sq in range(32) if 0 < ((7 - (sq >> 2)) if forward == bitboard.DOWN else (sq >> 2)) <= RUNAWAY_ROWS)
+                for forward in (bitboard.DOWN, bitboard.UP)}
+
+
+def runaways(men, opp, forward):
+    """The number of men (a bit mask) near the crown row with no opposition counter in front of them"""
+    count = 0
+    for sq in bitboard.iterSquares(men & RUNAWAY_ZONE[forward]):
+        if not opp & RUNAWAY_CONES[forward][sq]:
+            count += 1
+    return count
+
+
+def mobility(own, opp, kings, forward):
+    """The number of single step moves the side owning own could make, counting each counter and direction once"""
+    empty = ~(own | opp) & bitboard.FULL
+    count = 0
+    for direction in bitboard.DIRECTIONS:
+        movers = own if direction[0] == forward else own & kings
+        if movers:
+            count += (bitboard.step(movers, direction) & empty).bit_count()
+    return count
+
+
+# whole numbers, so every score is an integer the parallel search can share in a 64 bit value
+DEFAULT_WEIGHTS = {
+    "men": 100,
+    "kings": 160,
+    "advancement": 3,
+    "backRow": 8,
+    "centre": 5,
+    "mobility": 2,
+    "runaway": 30,
+}
+
+
+def loadWeights(path):
+    """Reads weights from a JSON object of name to number, any that are left out keep their default"""
+    with open(path) as file:
+        loaded = json.load(file)
+    unknown = set(loaded) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError("unknown weights " + ", ".join(sorted(unknown)) + ", choose from " + ", ".join(DEFAULT_WEIGHTS))
+    weights = dict(DEFAULT_WEIGHTS)
+    for name, value in loaded.items():
+        weights[name] = int(value)
+    return weights
+
+
+class WeightedEvaluation:
+    """
+    A class to score a board from red's point of view as a weighted sum of its features
+
+    ...
+    Attributes
+    -----------
+    weights : dict
+        The weight of each feature in FEATURES, and of mobility and runaway
+
+    Methods
+    -------
+    __call__(board)
+        returns the score of the board, made from the features the board keeps up to date plus mobility and runaways,
+        which are found with a fixed number of bit mask operations, so no square is looked at one by one
+    explain(board)
+        returns each feature's value and weighted score, for tuning
+    """
+    def __init__(self, weights=None):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights != None:
+            self.weights.update(weights)
+        self.packedWeights = [(FIELD_BITS * index, self.weights[name]) for index, name in enumerate(FEATURES)]
+
+    def __call__(self, board):
+        packed = board.features + _PACKED_BIAS
+        score = 0
+        for shift, weight in self.packedWeights:
+            score += weight * (((packed >> shift) & _FIELD_MASK) - _FIELD_BIAS)
+        red, black, kings = board.redBits, board.blackBits, board.kingBits
+        weights = self.weights
+        if weights["mobility"]:
+            score += weights["mobility"] * (mobility(red, black, kings, bitboard.UP) - mobility(black, red, kings, bitboard.DOWN))
+        if weights["runaway"]:
+            score += weights["runaway"] * (runaways(red & ~kings, black, bitboard.UP) - runaways(black & ~kings, red, bitboard.DOWN))
+        return score
+
+    def explain(self, board):
+        values = unpack(board.features)
+        red, black, kings = board.redBits, board.blackBits, board.kingBits
+        values["mobility"] = mobility(red, black, kings, bitboard.UP) - mobility(black, red, kings, bitboard.DOWN)
+        values["runaway"] = runaways(red & ~kings, black, bitboard.UP) - runaways(black & ~kings, red, bitboard.DOWN)
+        return {name: (value, value * self.weights[name]) for name, value in values.items()}
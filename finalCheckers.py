@@ -1,409 +1,88 @@
+import argparse
+import os
 import time
-import pygame
-import sys # used for getting the max and min integers
-from copy import deepcopy
-pygame.init()
+import threading
+from checkersEngine import Counter, Board, SearchTimeout, Minimax, Play # the engine has no GUI code, so it can be imported without pygame
+from evaluation import loadWeights
+from gamerecord import appendGame
+from openingbook import OpeningBook
 
+pygame = None # loaded by loadPygame when the GUI is made, so importing this module does not start the display
+ENDGAME_FILE = "endgame.tb" # the endgame table the AI uses if it has been built next to the game with endgame.py
+BOOK_FILE = "opening.book" # the opening book the AI uses if it has been built next to the game with openingbook.py
 
-class Counter:
-    """
-    A class to represent each counter on a board
-
-    ...
-    Attributes
-    -----------
-    colour : string
-        The colour of the counter as a string
-    king : Boolean
-        If the counter is a king this value is True
-    pos : list
-        Contains the row and column of the counter
-
-
-    Methods
-    -------
-    updatePos(row, col)
-        updates the counters pos (position) to the new row and column
-    makeKing()
-        changes king to True
-    """
-    def __init__(self, colour, row, col):
-        self.colour = colour
-        self.king = False
-        self.pos = [row,col]
 
-    def updatePos(self, row, col):
-        self.pos = [row, col]
+def loadPygame():
+    global pygame
+    if pygame == None:
+        import pygame as module
+        module.init()
+        pygame = module
+    return pygame
 
-    def makeKing(self):
-        self.king = True
 
-class Board:
-    """
-    A class to represent the checkers board and to find the moves for the checkers
+def assetPath(name): # the images live next to this file, wherever the game is started from
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
 
-    ...
-    Attributes
-    -----------
-    board : list
-        Is a list of lists that represents the board in list form, when initialised all the counter objects are initialised too
-    reds : int
-        The number of red counters
-    redKings : int
-        The number of red kings
-    blacks : int
-        The number of black counters
-    blackKings : int
-        The number of black kings
-    validMoves : list
-        Contains the list of valid moves that the current selected counter may take
-    deleltedCheckers : list
-        Contains 2 values, one value is the position of the valid move after the hop, the other is the object of the counter which is deleted
 
-    Methods
-    -------
-    checkerPresent(row, cow)
-        checks to see if there is a counter present in the position - row , col in board, returns None or the counter object if counter present
-    checkWinner()
-        returns the colour of the player if they have won (due to looking at the checkers left on the board) or returns None if there is not yet a winner
-    checkValidMoves(counter)
-        takes a counter as the parameter and finds the valid moves by traversing left and right, blacks can only go down, reds can only go up and kings can go either
-    searchMove( row, col, oppColour, validRow, leftOrRight, hopped)
-        looks to see if a hop is avaliable using validRow and leftOrRight to find new positions, can only hop a counter if it is an oppositions colour (oppColour)
-    movePiece (self, counter, row, col)
-        This method takes a counter updates it into the position row, col, if the counter lands on a kings row, the counter becomes a king
-    delPiece(self, delChecker, fromChecker)
-        This method runs when a hop has occured, the delChecker object is deleted and if this deleted counter is a king, the checker fromChecker is made into a king
-    returnNoCounters()
-        returns the number of counters for each player, it is used in the minimax evaluation function
-    """
-    def __init__(self):
-        self.board = [[None,Counter("black", 0, 1), None, Counter("black", 0, 3), None,Counter("black", 0, 5), None, Counter("black", 0, 7)],
-                      [Counter("black", 1, 0), None, Counter("black", 1, 2), None, Counter("black", 1, 4), None, Counter("black", 1, 6), None],
-                      [None, Counter("black", 2, 1), None, Counter("black", 2, 3), None, Counter("black", 2, 5), None, Counter("black", 2, 7)],
-                      [None,None,None,None,None,None,None,None],
-                      [None,None,None,None,None,None,None,None],
-                      [Counter("red", 5, 0), None, Counter("red", 5, 2), None, Counter("red", 5, 4), None, Counter("red", 5, 6), None],
-                      [None,Counter("red", 6, 1), None, Counter("red", 6, 3), None,Counter("red", 6, 5), None, Counter("red", 6, 7)],
-                      [Counter("red", 7, 0), None, Counter("red", 7, 2), None, Counter("red", 7, 4), None, Counter("red", 7, 6), None]]
-        self.reds = 12
-        self.redKings = 0
-        self.blacks = 12
-        self.blackKings = 0
-        self.validMoves = []
-        self.deletedCheckers = []
-
-
-    def checkerPresent(self, row, col):
-        return self.board[row][col]
-
-    def checkWinner(self):
-        if self.reds <= 0:
-            return "black"
-        elif self.blacks <= 0:
-            return "red"
-        return None
-
-    def checkValidMoves(self, counter):
-        row, col = counter.pos
-        if counter.colour == "black": # find the oppostions counter colour
-            opp = "red"
-        else:
-            opp = "black"
-
-        #players can only move in their direction, kings can move in both
-        if counter.colour == "black" or counter.king == True:  # black counters can only move down
-            validRow = 1 
-            self.searchMove(row, col, opp, validRow, -1, []) # traverses left and down the board from current position
-            self.searchMove(row, col, opp, validRow, 1, []) # traverses right and down the board from current position
-        if counter.colour == "red" or counter.king == True: # red counters can only move up
-            validRow = -1 
-            self.searchMove(row, col, opp, validRow, -1, []) # traverses left and up the board from current position
-            self.searchMove(row, col, opp, validRow, 1, []) # traverses right and up the board from current position
-            
-        if len(self.deletedCheckers) > 0: #ensures forced capture - the player must choose a capture if there is an opportunity
-            chooseDel = []
-            for pos, hopped in self.deletedCheckers: # for the position of the valif move, the object that will be deleted
-                if pos in self.validMoves:
-                    chooseDel.append(pos)
-            self.validMoves = chooseDel # override the valid moves due to forced capture
-        return self.validMoves, self.deletedCheckers
-
-        
-    
-    def searchMove(self, row, col, oppColour, validRow, leftOrRight, hopped):
-        newRow = row + validRow # the potential new row position of a valid move
-        newCol = col + leftOrRight # the potential new column position of a valid move
-        if (0 <= newRow <= 7) and (0 <= newCol <= 7):  #if the move would not go over the board dimentions
-            counterPresent = self.checkerPresent(newRow, newCol) # what counter is present at this new position
-            if hopped == [] and counterPresent == None: # if there has not yet been a hop and their is no counter present, this square is valid with no hops
-                self.validMoves.append([newRow, newCol])
-            elif hopped != [] and counterPresent == None: # if there is no counter in a position, and a hop has taken place, the square is invalid due to after one hop can only complete another hop, not a normal valid move
-                return
-            elif counterPresent.colour == oppColour: # if the counter is equal to the oppositions counter, another hop could take place if the next square is valid
-                hopRow = newRow + validRow # a new position of the potential hop after passing the oppositions counter
-                hopCol = newCol + leftOrRight
-                if (0 <= hopRow <= 7) and (0 <= hopCol <= 7): # if the new hop is within the board dimentions
-                    newHopSquare = self.checkerPresent(hopRow, hopCol) 
-                    if newHopSquare == None: # if the square to hope to is empty, a hop can take place
-                        self.validMoves.append([hopRow, hopCol]) # this hop is valid
-                        newHop = hopped.copy() # had to copy as if not it rewrites hopped in other places
-                        newHop.append(counterPresent) # added to the list of hops for possible multiple hops
-                        self.deletedCheckers += [[[hopRow, hopCol], newHop]]
-                        if (0 < hopRow < 7) or (counterPresent.king != True): # at the kings line or a counter can be made into a king therefore the turn hults 
-                            self.searchMove(hopRow, hopCol, oppColour, validRow, -1, newHop) # if not then we can traverse again for another hop in both directions
-                            self.searchMove(hopRow, hopCol, oppColour, validRow, 1, newHop)
-    
-        return
-
-
-    def movePiece(self, counter, row, col): # moving the counter to its new position located at row, col
-        self.board[row][col] = counter # updates self.baord position to its new place, leaving its old position as a None value
-        self.board[counter.pos[0]][counter.pos[1]] = None 
-        counter.updatePos(row, col) # updates the counter object
-        if (row == 7 or row == 0) and (counter.king == False): # doesn't matter which row as cannot move backwards until is a king anyway
-            counter.makeKing() # new counter becomes a king
-            if counter.colour == "black":
-                self.blackKings += 1
-            else:
-                self.redKings += 1
-
-
-    def delPiece(self, delChecker, fromChecker):
-        self.board[delChecker.pos[0]][delChecker.pos[1]] = None # resets the deleted counter's position on the board to None
-        if delChecker.colour == "black": # other board parameters are updated
-            self.blacks -= 1
-            if delChecker.king == True:  
-                self.blackKings -= 1
-                if fromChecker.king == False: #Regicide - if the counter that has been deleted is a king the new counter becomes one (if not already)
-                    self.redKings += 1
-                    fromChecker.makeKing()
-        else:
-            self.reds -=1
-            if delChecker.king == True: 
-                self.redKings -= 1
-                if fromChecker.king == False: #Regicide - if the counter that has been deleted is a king the new counter becomes one (if not already)
-                    self.blackKings += 1
-                    fromChecker.makeKing()
-
-    def returnNoCounters(self):
-        return self.reds, self.blacks
-
-
-
-class Minimax:
+class GUI:
     """
-    A class to represent the minimax algorithm with alpha beta pruning
+    A class to draw the board and counters in the window
 
     ...
     Attributes
     -----------
-    maxsize : int
-        represents the highest integer
-    minsize : int
-        represents the lowest integer
-        
-    Methods
-    -------
-    minimaxMain(board, depth, player, alpha, beta)
-        This method is used to be the base before the search branches out, it also checks to see if we are at the lowest depth (0) or if there is a win, therfore no more moves can be made
-    maxEvaluation(self, board, depth, player, alpha, beta)
-        A method that searches for the maximum evaluation of the possible nodes and updates the max evaluation every time. alpha and beta are used to optimise the evaluation
-    minEvaluation(self, board, depth, player, alpha, beta)
-        A method that searches for the minimum evaluation of the possible nodes and updates the min evaluation  every time. alpha and beta are used to optimise the evaluation
-    getChildNone(board, player)
-        Gets all the counters on the board that the player owns and simulates each valid move, each valid move is simulated on a board and this method returns them all
-    getCounters(board, player)
-        Retrieves all the player's counters from the board
-    tryMove(board, counter, validMove, deletedCheckers)
-        This method simulates the valid move (validMove) on the board and returns the board with the counters new positions on them
-    evaluate(board)
-        This method is used to evaluate the board parameter, AI is trying to maximise the cost of red-black, where as the human player will want to minimise the cost of black-red
-    """
-    def __init__(self):
-        self.maxsize = sys.maxsize
-        self.minsize = -sys.maxsize -1
-
-    def minimaxMain(self, board, depth, player, alpha, beta): # player = True if AI therfore finding the max, player = False if human therefore finding the min
-        if depth == 0 or board.checkWinner()!= None: # if we are at the last depth of the tree, if game is won so is at a bottom leaf
-            return board, self.evaluate(board) # returns the minimax evaluation and the board with the best move
-        if player == True: # if this is an AI player
-            return self.maxEvaluation(board, depth, player, alpha, beta)
-        else:
-            return self.minEvaluation(board, depth, player, alpha, beta)
-
-
-    def maxEvaluation(self, board, depth, player, alpha, beta):
-        bestScore = self.minsize # sets to the smallest integer as this is the lowest max it can be to start with
-        bestMove = None
-        # for each child of the node
-        for child in self.getChildNode(board, player): # for each valid board simulaion, recursively call to
-            maxMove, maxEval = self.minimaxMain(child, depth-1, False, alpha, beta) # False as going to Human player
-            if maxEval > bestScore: # find the max of best score compared to maxEval
-                bestMove = child # best move is updated to child (the board) if evaluation is the best
-            if maxEval > alpha: #alpha-beta pruning -  find the max value of alpha compared to the evaluation
-                alpha = maxEval
-            if alpha >= beta: # stop exploring
-                break
-        return bestMove, bestScore # return the board and the evaluation
-        
-
-    def minEvaluation(self, board, depth, player, alpha, beta):
-        bestScore = self.maxsize # sets to the largest integer as this is the highest min it can be to start with
-        # for each child of the node
-        bestMove = None
-        for child in self.getChildNode(board, player):
-            minMove, minEval = self.minimaxMain(child, depth-1, True, alpha, beta) #True as going to AI player
-            if minEval < bestScore:# find the min of best score compared to minEval
-                bestMove = child  #best move is updated to child (the board) if evaluation is the best
-            if minEval < beta:
-                beta = minEval
-            if alpha >= beta: # stop exploring
-                break
-        return bestMove, bestScore # return the board and the evaluation
-
-
-    def getChildNode(self, board, player): # get the valid moves for each counter in either list of counters
-        validBoards = [] 
-        counters = self.getCounters(board, player) # gets all counters the player owns
-        for counter in counters: # for each counter of the player we are interested in, we find all valid moves, along with valid hopped moves
-            board.validMoves = []
-            board.deletedCheckers = []
-            validMoves, delCounters = board.checkValidMoves(counter) # get the valid moves along with the counters that might be hopped over
-            experimentBoard = None
-            for validMove in validMoves: # for each valid move of that checker
-                experimentBoard = deepcopy(board) # to save a new board that will not effect the current board that the players are playing on
-                experimentCounter = experimentBoard.checkerPresent(counter.pos[0], counter.pos[1]) # get the counter's position on the new board
-                newBoard = self.tryMove(experimentBoard, experimentCounter, validMove, delCounters) # try the valid position on a new board
-                validBoards.append(newBoard)
-        return validBoards
-                
-    
-    def getCounters(self, board, player): #returns all the counters from the player that is on the board
-        counters = []
-        for row in board.board:
-            for space in row:
-                if space != None:    
-                    if space.colour == "black" and player == False:
-                        counters.append(space)
-                    elif space.colour == "red" and player == True:
-                        counters.append(space)
-        return counters
-    
-
-    def tryMove(self, board, counter, validMove, deletedCheckers):
-        board.movePiece(counter, validMove[0], validMove[1]) # moves the piece on the new board
-        for pos, hopped in deletedCheckers: # each hopped over piece is deleted
-            if validMove == pos:
-                board.delPiece(hopped[0], counter)
-        return board
-
-
-    def evaluate(self, board):
-        reds, blacks = board.returnNoCounters()
-        return reds - blacks
-
-
-
-class Play:
-    """
-    A class to represent the overall game the players are playing
+    boardImg : pygame.Surface
+        The board picture, scaled to the window and converted to the display's pixel format once when the GUI is made
+    sprites : dict
+        The counter pictures keyed by (colour, king), scaled and converted once so drawing a counter is a single blit
+    shown : dict
+        What was last drawn on each square, (row, col) -> ((colour, king) or None, hinted), so only squares that differ are redrawn
+    thinkingShown : Boolean
+        Whether the thinking label is on the screen
+    frames : int
+        The number of times updatePlay has been called
+    rectsUpdated : int
+        The number of rectangles of the window updated over all those frames
+    drawSeconds : float
+        The time spent in updatePlay over all those frames, so the cost of redrawing can be measured
 
-    ...
-    Attributes
-    -----------
-    currentPlayer : string
-        the colour of the current player's counters
-    checkersBoard : Board() object
-        Used as the board that the players are playing on in this and related class/s
-    checkerSelected: Boolean
-        To show that a player has already selected a counter throught the GUI
-    pickedChecker : None/Counter()
-        To show that a sqaure has been clicked on to be moved to
-        
     Methods
     -------
-    chosen(row, col)
-        Allows the user to select a valid counter and move it to a correct place
-    move(row, col)
-        Returns True if the user's counter can be moved to the selected board place
-    changePlayer()
-        Changes turns of the players
-    updateBoard()
-        Used after an AI player takes its turn to set the board equal to the board that they found has the best evaluation on it. The players are then switched.
+    setWindow(board)
+        Titles the window and draws all of it
+    updateBoard(board, valid, thinking)
+        Draws the whole board again whatever was shown before
+    updatePlay(board, valid, thinking)
+        Redraws only the squares that have changed since the last frame and updates just those parts of the window
     """
-    def __init__(self):
-        self.currentPlayer = "black"
-        self.checkersBoard = Board()
-        self.checkerSelected = False
-        self.pickedChecker = None
-
-    def chosen(self, row, col):
-        if self.checkerSelected == False: # if a counter is yet to be selected, identify it with the row and col parameter
-            selectedChecker = self.checkersBoard.checkerPresent(row, col)
-            if selectedChecker != None and selectedChecker.colour == self.currentPlayer: # if there is the player's counter present
-                self.checkerSelected = True # then select this counter
-                self.pickedChecker = selectedChecker
-                v, d = self.checkersBoard.checkValidMoves(self.pickedChecker) #identify the valid moves
-        else: # when a counter has been selected
-            if self.move(row, col) == False:  # see if the counter has any valid moves so it can move
-                self.checkerSelected = False # if it can't then we reselect our checker by recursively running this method
-                self.chosen(row, col)
-            else:
-                self.changePlayer() # opposition has moved thier piece successfully, so rotate the players
-
-
-    def move(self, row, col):
-        newPos = self.checkersBoard.checkerPresent(row,col)
-        if newPos == None and [row,col] in self.checkersBoard.validMoves:
-            self.checkersBoard.movePiece(self.pickedChecker, row, col)
-            for pos, hopped in self.checkersBoard.deletedCheckers:
-                if [row, col] == pos:
-                    for hop in hopped:
-                        self.checkersBoard.delPiece(hop, self.pickedChecker)
-            return True
-        return False
-            
-
-    def changePlayer(self):
-        if self.currentPlayer == "red":
-            self.currentPlayer = "black"
-        else:
-            self.currentPlayer = "red"
-        self.checkersBoard.validMoves = []
-        self.checkersBoard.deletedCheckers = []
-        
-
-    def updateBoard(self, board):
-        self.checkersBoard = board # updates the AI board
-        self.changePlayer()
-            
-    
-
-class GUI:
     def __init__(self, hints):
+        loadPygame() # pygame and the images are only loaded once a window is wanted
         self.startWindow = pygame.display.set_mode((500,500))
         self.gameDisplay = pygame.display.set_mode((800,800))
         self.bgColour = (255,255,255) # the colour of the side window
         self.sidePos = [0,0,0,0] # the dimentions of the side screen
-        self.blackCounter = pygame.image.load('counter1.png')
-        self.bKing = pygame.image.load('kingcounter1.png')
-        self.redCounter = pygame.image.load('counter2.png')
-        self.rKing = pygame.image.load('kingcounter2.png')
         self.counterSize = 90
-        self.boardPos = [[(105,5),(305, 5), (505,5), (705,5)],
-                        [(5, 105), (205, 105), (405,105), (605,105)],
-                        [(105,205),(305, 205), (505,205), (705,205)],
-                        [(5, 305), (205, 305), (405,305), (605,305)],
-                        [(105,405),(305, 405), (505,405), (705,405)],
-                        [(5, 505), (205, 505), (405,505), (605,505)],
-                        [(105,605),(305, 605), (505,605), (705,605)],
-                        [(5, 705), (205, 705), (405,705), (605,705)]]
-        self.boardImg = pygame.image.load('board.png')
+        self.squareSize = 100
         self.boardHeight = 800
         self.boardWidth = 800
+        # everything is scaled and converted to the display's format here, once, rather than every frame
+        self.boardImg = pygame.transform.scale(pygame.image.load(assetPath('board.png')), (self.boardWidth, self.boardHeight)).convert()
+        self.sprites = {}
+        for colour, king, name in (("black", False, 'counter1.png'), ("black", True, 'kingcounter1.png'),
+                                   ("red", False, 'counter2.png'), ("red", True, 'kingcounter2.png')):
+            image = pygame.image.load(assetPath(name))
+            self.sprites[(colour, king)] = pygame.transform.scale(image, (self.counterSize, self.counterSize)).convert_alpha()
         self.hints = hints
-        
+        self.font = pygame.font.Font(None, 40) # pygame's built in font
+        self.thinkingText = self.font.render("Thinking...", True, (0,0,0), self.bgColour).convert()
+        self.thinkingRect = self.thinkingText.get_rect(topleft=(10, 10)) # top left, over the board
+        self.shown = {}
+        self.thinkingShown = False
+        self.frames = 0
+        self.rectsUpdated = 0
+        self.drawSeconds = 0.0
+
 
     def setWindow(self, board):
         pygame.display.set_caption('Checkers') # sets windows title
@@ -411,54 +90,122 @@ class GUI:
         self.updateBoard(board)
 
 
-    def updateBoard(self, board):
-        self.gameDisplay.blit(pygame.transform.scale(self.boardImg, (self.boardWidth, self.boardHeight)), (0,0)) # displays the checkers board
-        for checker in self.getCounters(board, "black"): # displayes each black counter
-            row, col = self.getCounterPos(checker.pos)
-            boardPos = self.boardPos[row][col]
-            if checker.king == True:
-                self.gameDisplay.blit(pygame.transform.scale(self.bKing, (90, 90)), (boardPos[0], boardPos[1]))
-            else:
-                self.gameDisplay.blit(pygame.transform.scale(self.blackCounter, (90, 90)), (boardPos[0], boardPos[1]))
-        for checker in self.getCounters(board, "red"): # displays each red counter
-            row, col = self.getCounterPos(checker.pos)
-            boardPos = self.boardPos[row][col]
-            if checker.king == True:
-                self.gameDisplay.blit(pygame.transform.scale(self.rKing, (90, 90)), (boardPos[0], boardPos[1]))
-            else:
-                self.gameDisplay.blit(pygame.transform.scale(self.redCounter, (90, 90)), (boardPos[0], boardPos[1]))
-
-    def getCounters(self, board, player):
-        counters = []
-        for row in board.board:
-            for space in row:
-                if space != None:    
-                    if space.colour == "black" and player == "black":
-                        counters.append(space)
-                    elif space.colour == "red" and player == "red":
-                        counters.append(space)
-        return counters
-
-    def getCounterPos(self, pos):
-        r = pos[0]
-        c = int(pos[1]/2)
-        return r, c
-
-    def showValidMoves(self, valid):
-        for move in valid: # indicate each valid move to the user by green circles
-            x = (move[1] *100) +50
-            y = (move[0] *100) +50
-            pygame.draw.circle(self.gameDisplay, (0,255,0), (x,y), 20)
-
-
-    def updatePlay(self, board, valid):
-        self.updateBoard(board) # updates all the counters on the board
-        if self.hints == True:
-            self.showValidMoves(valid) # shows all the valid moves on the board
+    def updateBoard(self, board, valid=(), thinking=False):
+        self.gameDisplay.blit(self.boardImg, (0,0)) # displays the checkers board
+        self.shown = {} # nothing counts as drawn, so every square is drawn again
+        self.thinkingShown = False
+        self.updatePlay(board, valid, thinking)
         pygame.display.update() # updates the entire window
 
+    def squareContents(self, board, valid):
+        hinted = set()
+        if self.hints == True:
+            hinted = set((move[0], move[1]) for move in valid)
+        contents = {}
+        for row in range(8):
+            for col in range(8):
+                checker = board.board[row][col]
+                counter = None
+                if checker != None:
+                    counter = (checker.colour, checker.king == True)
+                contents[(row, col)] = (counter, (row, col) in hinted)
+        return contents
+
+    def drawSquare(self, row, col, counter, hinted):
+        rect = pygame.Rect(col * self.squareSize, row * self.squareSize, self.squareSize, self.squareSize)
+        self.gameDisplay.blit(self.boardImg, rect, rect) # the board under the square wipes whatever was there
+        if counter != None:
+            self.gameDisplay.blit(self.sprites[counter], (rect.x + 5, rect.y + 5))
+        if hinted == True: # indicate a valid move to the user by a green circle
+            pygame.draw.circle(self.gameDisplay, (0,255,0), rect.center, 20)
+        return rect
+
+
+    def updatePlay(self, board, valid, thinking=False):
+        start = time.perf_counter()
+        rects = []
+        if thinking != self.thinkingShown: # the label comes or goes, so the squares under it have to be drawn again
+            self.gameDisplay.blit(self.boardImg, self.thinkingRect, self.thinkingRect)
+            rects.append(self.thinkingRect)
+            for square in list(self.shown):
+                if self.thinkingRect.colliderect(pygame.Rect(square[1] * self.squareSize, square[0] * self.squareSize, self.squareSize, self.squareSize)):
+                    del self.shown[square]
+        for square, content in self.squareContents(board, valid).items():
+            if self.shown.get(square) != content:
+                rects.append(self.drawSquare(square[0], square[1], content[0], content[1]))
+                self.shown[square] = content
+        if thinking == True and (self.thinkingShown == False or self.thinkingRect.collidelist(rects) != -1):
+            self.gameDisplay.blit(self.thinkingText, self.thinkingRect) # lets the user know the AI is working on its move
+            rects.append(self.thinkingRect)
+        self.thinkingShown = thinking
+        if rects: # an unchanged board costs nothing to show
+            pygame.display.update(rects)
+        self.frames += 1
+        self.rectsUpdated += len(rects)
+        self.drawSeconds += time.perf_counter() - start
+
+
+
+class AISearch:
+    """
+    A class to run the AI's search on a background thread so the window keeps responding while it thinks
+
+    ...
+    Attributes
+    -----------
+    minimax : Minimax or ParallelSearch
+        The search to run, its cancel token is cleared when the search starts and set to stop it
+    board : Board
+        A private copy of the board being played on, the search makes and takes back moves on it while the GUI draws the real one
+    move : Move
+        The move the AI has chosen, None until finished or if it has no moves
+    bookMove : Move
+        A move already chosen from the opening book, which is played without searching, otherwise None
+    evaluation : int
+        The minimax evaluation of move
+    finished : Boolean
+        Becomes True once the search and the minimum display delay are both over
+    thread : threading.Thread
+        The thread the search runs on
+
+    Methods
+    -------
+    run()
+        Searches for the AI's move unless it has a book move, then waits out whatever is left of minDelay, this runs on the thread
+    cancel()
+        Stops the search and waits for the thread to end
+    """
+    def __init__(self, minimax, board, timeLimit, depth, minDelay=0, bookMove=None):
+        self.minimax = minimax
+        self.board = Board.fromEncoding(board.encode())
+        self.timeLimit = timeLimit
+        self.depth = depth
+        self.minDelay = minDelay
+        self.bookMove = bookMove
+        self.move = None
+        self.evaluation = None
+        self.finished = False
+        self.minimax.cancel.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        start = time.perf_counter()
+        if self.bookMove != None:
+            self.move = self.bookMove
+        else:
+            self.move, self.evaluation = self.minimax.iterativeDeepening(self.board, True, self.timeLimit, self.depth)
+        remaining = self.minDelay - (time.perf_counter() - start)
+        if remaining > 0: # the delay runs alongside the search, only what is left of it is waited for
+            self.minimax.cancel.wait(remaining) # returns straight away if cancelled
+        self.finished = True
+
+    def cancel(self):
+        self.minimax.cancel.set()
+        self.thread.join()
+
+
 
-    
 class Main:
     """
     A class to tie the other classes together and to all for the GUI to be used
@@ -467,67 +214,176 @@ class Main:
     Attributes
     -----------
     depth: int
-        The specified depth given by the user
+        The specified depth given by the user, the deepest the AI will search
+    timeLimit : float
+        The number of seconds the AI may spend searching each move, it searches deeper and deeper until this runs out or depth is reached
+    workers : int
+        The number of processes the AI searches with, more than 1 uses a ParallelSearch
     gui : object
         So main can interact with the GUI class
     play : object
         So main can interact with the Play class
      minimax: object
-         So main can interact with the Minimax class
+         So main can interact with the Minimax class, or the ParallelSearch class when there is more than one worker
+    minDelay : float
+        The shortest time in seconds the AI takes over a move, so the user can see it happen
+    frameRate : int
+        How many times a second the window is redrawn
+    thinking : AISearch
+        The AI's search while it is running, otherwise None
+    stats : StatsRecorder
+        Records how each of the AI's searches went when a stats log or profiler is asked for, otherwise None
+    book : OpeningBook
+        The opening book the AI plays from while the game is still in it, None for no book
+    recordPath : string
+        The file each game's record is added to when it ends or is restarted, PDN text for a .pdn file and packed otherwise. None to not keep records
 
     Methods
     -------
     main()
-        Where the players take turns and where the GUI receives its events from
+        Where the players take turns and where the GUI receives its events from. The AI plays from the opening book while it can and searches otherwise. The window keeps being redrawn while the AI thinks, the r key restarts the game
+    reset()
+        Cancels any search that is running, saves the game's record and starts a new game
+    newGame()
+        Starts a new game, its record names the players
+    saveRecord()
+        Adds the game's record to recordPath, if it is set and any moves have been made
     """
-    def __init__(self, level, hints):
+    def __init__(self, level, hints, timeLimit=0.2, workers=1, minDelay=1.0, frameRate=30, statsLog=None, profiler=None, profilePath=None, weights=None, batch=False, endgamePath=None, bookPath=None, recordPath=None):
         self.depth = level
+        self.timeLimit = timeLimit
+        self.workers = workers
+        self.minDelay = minDelay
+        self.frameRate = frameRate
+        self.thinking = None
+        self.recordPath = recordPath
         self.gui = GUI(hints)
-        self.play = Play()
+        self.newGame()
         self.gui.setWindow(self.play.checkersBoard)
-        self.minimax = Minimax()
+        if workers > 1: # the root moves are shared out between worker processes
+            from parallel import ParallelSearch
+            self.minimax = ParallelSearch(workers, weights=weights, batch=batch, endgamePath=endgamePath)
+        else:
+            self.minimax = Minimax(weights=weights, batch=batch, endgamePath=endgamePath)
+        self.stats = None
+        if statsLog != None or profiler != None: # only imported when asked for, a search without a recorder is not slowed at all
+            from searchstats import StatsRecorder
+            self.stats = StatsRecorder(self.minimax, statsLog, profiler, profilePath)
+        self.book = None
+        if bookPath != None:
+            self.book = OpeningBook(bookPath)
         self.main()
 
     def main(self):
         valid = True
+        clock = pygame.time.Clock()
         while valid:
             if self.play.checkersBoard.checkWinner() != None:
                 print("Welldone", self.play.checkersBoard.checkWinner(), "you have won")
+                self.play.record.finish(self.play.checkersBoard.checkWinner())
                 valid = False
 
-            if self.play.currentPlayer == "red":
-                board, evaluation = self.minimax.minimaxMain(self.play.checkersBoard, self.depth, True, -sys.maxsize-1, sys.maxsize)
-                time.sleep(1)
-                self.play.updateBoard(board)
-                self.gui.updateBoard(board)
-                pygame.display.update()
+            if self.play.currentPlayer == "black" and valid == True and len(self.play.checkersBoard.generateMoves(False)) == 0:
+                print("Welldone red you have won") # the user has no legal moves left
+                self.play.record.finish("red")
+                valid = False
+
+            if self.play.currentPlayer == "red" and valid == True:
+                if self.thinking == None: # start the AI's search in the background
+                    bookMove = None
+                    if self.book != None: # a book move is played straight away, though still after minDelay
+                        bookMove = self.book.choose(self.play.checkersBoard, True)
+                        if bookMove != None and self.stats != None:
+                            self.stats.recordBookMove(self.play.checkersBoard)
+                    self.thinking = AISearch(self.minimax, self.play.checkersBoard, self.timeLimit, self.depth, self.minDelay, bookMove)
+                elif self.thinking.finished == True:
+                    move, score = self.thinking.move, self.thinking.evaluation
+                    self.thinking = None
+                    if move == None: # the AI has no valid moves left
+                        print("Welldone black you have won")
+                        self.play.record.finish("black")
+                        valid = False
+                    else:
+                        self.play.updateBoard(move, score)
                 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     valid = False
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.reset()
                     
-                if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.type == pygame.MOUSEBUTTONDOWN and self.thinking == None: # clicks are ignored while the AI is thinking
                     x, y = pygame.mouse.get_pos()
                     col = int(x/100) # column
                     row = int(y/100) # row
                     self.play.chosen(row,col)
-            self.gui.updatePlay(self.play.checkersBoard, self.play.checkersBoard.validMoves)
+            self.gui.updatePlay(self.play.checkersBoard, self.play.checkersBoard.validMoves, self.thinking != None)
+            clock.tick(self.frameRate) # waits so the loop runs at frameRate rather than as fast as it can
+        if self.thinking != None:
+            self.thinking.cancel()
+        self.saveRecord() # an unfinished game is saved with the result "*"
+        if self.workers > 1:
+            self.minimax.close()
+        if self.stats != None:
+            self.stats.close()
+        if self.book != None:
+            self.book.close()
         pygame.quit()
 
 
-print("Welcome to Checkers!")
-level = int(input("What level would you like to play at? (1-5) 1 is easy, 5 is hardest: "))
-hints = input("Would you like the valid moves at that counter to turned on? (yes/no)")
-if hints == "yes":
-    hints = True
-else:
-    hints = False
-rule = input("Would you like to see the rules before you begin the game? (yes/no)")
-if rule == "yes":
-    print("Rules")
+    def reset(self):
+        if self.thinking != None:
+            self.thinking.cancel()
+            self.thinking = None
+        self.saveRecord()
+        self.newGame()
 
-print("Game starting...")
+    def newGame(self):
+        self.play = Play()
+        self.play.record.tags.update({"Black": "Human", "White": f"Computer level {self.depth}"})
+
+    def saveRecord(self):
+        if self.recordPath != None and self.play.record.moves:
+            appendGame(self.recordPath, self.play.record)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Play checkers against the computer")
+    parser.add_argument("--level", type=int, default=3, choices=range(1, 21), metavar="DEPTH", help="the deepest the AI searches, 1 is easy, 5 is hard (default 3)")
+    parser.add_argument("--hints", action="store_true", help="show the valid moves of the selected counter")
+    parser.add_argument("--rules", action="store_true", help="print the rules before the game starts")
+    parser.add_argument("--time-limit", type=float, default=0.2, help="seconds the AI may search each move (default 0.2)")
+    parser.add_argument("--workers", type=int, default=1, help="processes the AI searches with (default 1)")
+    parser.add_argument("--min-delay", type=float, default=1.0, help="shortest time in seconds the AI takes over a move (default 1)")
+    parser.add_argument("--fps", type=int, default=30, help="frames drawn per second (default 30)")
+    parser.add_argument("--weights", default=None, help="JSON file of weights for the AI's evaluation, see evaluation.DEFAULT_WEIGHTS")
+    parser.add_argument("--batch-eval", action="store_true", help="score the leaves of the AI's search in batches with NumPy")
+    parser.add_argument("--endgame", default=None, help="endgame table file made by endgame.py, by default " + ENDGAME_FILE + " next to the game if it is there")
+    parser.add_argument("--book", default=None, help="opening book file made by openingbook.py, by default " + BOOK_FILE + " next to the game if it is there")
+    parser.add_argument("--no-book", action="store_true", help="always search, even in the opening")
+    parser.add_argument("--record", default=None, help="file to add the record of every game to, PDN text if it ends in .pdn and packed otherwise (see gamerecord.py)")
+    parser.add_argument("--stats-log", default=None, help="file to append the stats of each AI search to as JSON lines")
+    parser.add_argument("--profile", default=None, choices=["cprofile", "pyinstrument"], help="profile the AI's searches")
+    parser.add_argument("--profile-out", default="search.prof", help="file the profile is written to when the game ends (default search.prof)")
+    args = parser.parse_args(arguments)
+    if args.workers > 1 and (args.stats_log != None or args.profile != None):
+        parser.error("--stats-log and --profile record a single process search, use them with --workers 1")
+    weights = loadWeights(args.weights) if args.weights != None else None
+    endgamePath = args.endgame
+    if endgamePath == None and os.path.exists(assetPath(ENDGAME_FILE)):
+        endgamePath = assetPath(ENDGAME_FILE)
+    bookPath = args.book
+    if bookPath == None and os.path.exists(assetPath(BOOK_FILE)):
+        bookPath = assetPath(BOOK_FILE)
+    if args.no_book == True:
+        bookPath = None
+    print("Welcome to Checkers!")
+    if args.rules == True:
+        print("Rules")
+    print("Game starting...")
+    Main(args.level, args.hints, args.time_limit, args.workers, args.min_delay, args.fps, args.stats_log, args.profile, args.profile_out, weights, args.batch_eval, endgamePath, bookPath, args.record)
 
-if __name__ == "__main__":
-    Main(level, hints)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+
+from bitboard import capturedMask, movePath
+
+# A game is kept as the moves played from the starting position, the search score behind each move the computer made
+# and the result. It is written either as PDN text, readable and the format other checkers programs use, or packed in
+# a binary file at 10 bytes a move. Squares are numbered 1 to 32 as in perft.py's positions, black's men start on 1 to
+# 12 and move first. Red plays the part PDN calls White, so "1-0" is a win for black and "0-1" a win for red. Both
+# formats are read a game at a time, so files of any size can be streamed.
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2") # unfinished, black won, red won, drawn
+RESULT_VALUES = {"1-0": -1, "0-1": 1, "1/2-1/2": 0} # each finished result from red's point of view, as scores are
+MAGIC = b"CKGR"
+VERSION = 1
+HEADER = struct.Struct("<4sH") # magic, version
+GAME = struct.Struct("<BH") # result, as its place in RESULTS, and the number of moves
+MOVE = struct.Struct("<BBIi") # start square, end square, bit mask of the squares captured, search score
+NO_SCORE = -2 ** 31 # the score of a move that was not searched for, a human's or a book move
+SCORE_LIMIT = 2 ** 31 - 1 # scores past this, the search's wins and losses, are cut down to it
+# A training row: the position, the side to move, the game's result and the search score, both from red's point of
+# view. The rows are packed with no gaps, so a file of them is an array numpy.memmap can open with ROW_FIELDS as is.
+ROW = struct.Struct("<IIIBbi") # red, black and king bit masks, red to move, result, score
+ROW_FIELDS = [("red", "<u4"), ("black", "<u4"), ("kings", "<u4"), ("redToMove", "u1"), ("result", "i1"), ("score", "<i4")]
+_TOKENS = re.compile(r"\{(?P<comment>[^}]*)\}|(?<![\d/])(?P<result>1/2-1/2|1-0|0-1|\*)(?![\d/])|(?P<move>\d+(?:[-x]\d+)+)|\d+\.(?:\.\.)?")
+_TAG = re.compile(r'\[(\w+)\s+"([^"]*)"\]')
+
+
+def moveText(move):
+    """The move in PDN, 9-13 for a step and 22x15x6 for hops, every square landed on listed"""
+    return ("x" if move.captured else "-").join(str(sq + 1) for sq in movePath(move))
+
+
+def _startingBoard():
+    from checkersEngine import Board # imported here rather than at the top, checkersEngine imports this module for Play's record
+    return Board()
+
+
+def _legalMove(board, player, matches):
+    for move in board.generateMoves(player):
+        if matches(move):
+            return move
+    return None
+
+
+class GameRecord:
+    """
+    A class to keep the moves of a game as it is played, so it can be saved, read back and replayed
+
+    ...
+    Attributes
+    -----------
+    tags : dict
+        The PDN tags of the game, such as who played black and white (red) and when
+    moves : list
+        Every move played, as bitboard Move tuples, black's first
+    scores : list
+        The search score, from red's point of view, of each move, None for a move that was not searched for
+    result : string
+        One of RESULTS, "*" until the game is finished
+
+    Methods
+    -------
+    addMove(move, score)
+        adds the next move played and the score the search gave it
+    finish(winner)
+        sets the result from the winner, "red", "black" or "draw"
+    toPDN()
+        returns the game as PDN text
+    """
+    def __init__(self, tags=None):
+        self.tags = {"Event": "Checkers", "Date": time.strftime("%Y.%m.%d"), "Black": "?", "White": "?", "GameType": "21"}
+        if tags != None:
+            self.tags.update(tags)
+        self.moves = []
+        self.scores = []
+        self.result = "*"
+
+    def addMove(self, move, score=None):
+        self.moves.append(move)
+        self.scores.append(score)
+
+    def finish(self, winner):
+        self.result = {"black": "1-0", "red": "0-1", "draw": "1/2-1/2"}[winner]
+
+    def toPDN(self):
+        lines = [f'[{name} "{value}"]' for name, value in self.tags.items() if name != "Result"]
+        lines.append(f'[Result "{self.result}"]')
+        lines.append("")
+        words = []
+        for ply, (move, score) in enumerate(zip(self.moves, self.scores)):
+            if ply % 2 == 0:
+                words.append(str(ply // 2 + 1) + ".")
+            words.append(moveText(move))
+            if score != None:
+                words.append("{" + f"{score:+d}" + "}")
+        words.append(self.result)
+        line = ""
+        for word in words: # movetext lines are kept under 80 characters
+            if line and len(line) + len(word) >= 80:
+                lines.append(line)
+                line = ""
+            line = word if not line else line + " " + word
+        lines.append(line)
+        return "\n".join(lines) + "\n"
+
+
+def writePDN(file, record):
+    file.write(record.toPDN() + "\n")
+
+
+def packedScore(score):
+    if score == None:
+        return NO_SCORE
+    return max(-SCORE_LIMIT, min(SCORE_LIMIT, score))
+
+
+def writePacked(file, record):
+    file.write(GAME.pack(RESULTS.index(record.result), len(record.moves)))
+    for move, score in zip(record.moves, record.scores):
+        file.write(MOVE.pack(move.start, move.end, capturedMask(move), packedScore(score)))
+
+
+def appendGame(path, record):
+    """Adds the game to the end of path, as PDN text if path ends in .pdn and packed otherwise"""
+    if path.endswith(".pdn"):
+        with open(path, "a") as file:
+            writePDN(file, record)
+        return
+    with open(path, "ab") as file:
+        if file.tell() == 0: # a new file starts with its header
+            file.write(HEADER.pack(MAGIC, VERSION))
+        writePacked(file, record)
+
+
+def readPDN(file):
+    """Yields a GameRecord for each game in a PDN text file, reading it a line at a time"""
+    tags = {}
+    tokens = []
+    for line in file:
+        tag = _TAG.match(line.strip())
+        if tag != None:
+            tags[tag.group(1)] = tag.group(2)
+            continue
+        for token in _TOKENS.finditer(line):
+            if token.group("comment") != None:
+                tokens.append(("comment", token.group("comment").strip()))
+            elif token.group("move") != None:
+                tokens.append(("move", token.group("move")))
+            elif token.group("result") != None: # the result ends the game's movetext
+                yield _gameFromTokens(tags, tokens, token.group("result"))
+                tags = {}
+                tokens = []
+    if tokens: # a file cut off part way through a game
+        yield _gameFromTokens(tags, tokens, "*")
+
+
+def _gameFromTokens(tags, tokens, result):
+    record = GameRecord(tags)
+    record.result = result
+    board = _startingBoard()
+    player = False
+    for kind, text in tokens:
+        if kind == "comment":
+            if record.moves and re.fullmatch(r"[+-]?\d+", text):
+                record.scores[-1] = int(text)
+            continue
+        squares = [int(sq) - 1 for sq in re.split("[-x]", text)]
+        if "x" in text and len(squares) == 2: # a hop may be written with just its start and end squares
+            move = _legalMove(board, player, lambda move: move.captured and move.start == squares[0] and move.end == squares[1])
+        else:
+            move = _legalMove(board, player, lambda move: movePath(move) == squares)
+        if move == None:
+            raise ValueError(f"{text} is not a legal move after {len(record.moves)} plies")
+        record.addMove(move)
+        board.applyMove(move)
+        player = not player
+    return record
+
+
+def readPacked(file):
+    """Yields a GameRecord for each game in a packed binary file, reading it a game at a time"""
+    magic, version = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(getattr(file, "name", "file") + " is not a version " + str(VERSION) + " game record file")
+    while True:
+        data = file.read(GAME.size)
+        if len(data) < GAME.size:
+            return
+        result, length = GAME.unpack(data)
+        record = GameRecord({"Date": "????.??.??"}) # the tags are not packed, so when the game was played is not known
+        record.result = RESULTS[result]
+        board = _startingBoard()
+        player = False
+        for start, end, captured, score in MOVE.iter_unpack(file.read(length * MOVE.size)):
+            move = _legalMove(board, player, lambda move: move.start == start and move.end == end and capturedMask(move) == captured)
+            if move == None:
+                raise ValueError(f"an illegal move from {start + 1} to {end + 1} after {len(record.moves)} plies")
+            record.addMove(move, None if score == NO_SCORE else score)
+            board.applyMove(move)
+            player = not player
+        yield record
+
+
+def readGames(path):
+    """Yields every game in path, PDN text if it ends in .pdn and packed otherwise, reading it a game at a time"""
+    if path.endswith(".pdn"):
+        with open(path) as file:
+            yield from readPDN(file)
+    else:
+        with open(path, "rb") as file:
+            yield from readPacked(file)
+
+
+def replay(record):
+    """
+    Yields (board, player, move, score) for every move of the game, with board the position before the move and
+    player True when red is to move. The same Board is used all the way through, the move is made on it once the
+    caller asks for the next one, so copy it (Board.encode or Board.pack) to keep a position.
+    """
+    board = _startingBoard()
+    player = False
+    for move, score in zip(record.moves, record.scores):
+        yield board, player, move, score
+        board.applyMove(move)
+        player = not player
+
+
+def exportRows(paths, outPath, unfinished=False):
+    """
+    Writes a training row for every position in the games in paths to outPath, streaming the games so there is no
+    limit to how many there are. Unfinished games are left out unless unfinished is True, their result is written as
+    0. Returns the number of rows written.
+    """
+    rows = 0
+    with open(outPath, "wb") as out:
+        for path in paths:
+            for record in readGames(path):
+                if record.result == "*" and unfinished == False:
+                    continue
+                result = RESULT_VALUES.get(record.result, 0)
+                for board, player, move, score in replay(record):
+                    out.write(ROW.pack(board.redBits, board.blackBits, board.kingBits, player, result, packedScore(score)))
+                    rows += 1
+    return rows
+
+
+def loadRows(path):
+    """The rows written by exportRows as a read only NumPy record array, memory mapped so only what is used is read"""
+    import numpy as np # only needed to read the rows back
+    dtype = np.dtype(ROW_FIELDS)
+    if os.path.getsize(path) == 0: # an empty file cannot be mapped
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Prints game record files as PDN or exports their positions as training rows")
+    parser.add_argument("paths", nargs="+", help="game record files, PDN text if they end in .pdn and packed otherwise")
+    parser.add_argument("--export", default=None, help="file to write a training row for every position to, instead of printing the games")
+    parser.add_argument("--unfinished", action="store_true", help="export the positions of unfinished games too, with a result of 0")
+    args = parser.parse_args(arguments)
+    if args.export != None:
+        start = time.perf_counter()
+        rows = exportRows(args.paths, args.export, args.unfinished)
+        print(f"{rows} rows of {ROW.size} bytes written to {args.export} in {time.perf_counter() - start:.1f}s")
+        return 0
+    for path in args.paths:
+        for record in readGames(path):
+            print(record.toPDN())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
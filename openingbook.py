@@ -0,0 +1,218 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+import time
+
+import transposition
+from bitboard import capturedMask
+from checkersEngine import Board, Minimax
+
+# An opening book holds the moves worth playing in the positions near the start of the game, found offline by a deep
+# search of every move in each of them. A position is keyed by its Zobrist hash with the side to move xored in, the same
+# key the transposition table uses, and the keys are seeded so they are the same every run. Each book move is one fixed
+# size record and the records are sorted by key, so a position's moves sit next to each other and are found with a
+# binary search of the memory mapped file. Every move has a weight, larger for better moves, and moves are picked at
+# random in proportion to it so the AI does not open the same way every game.
+MAGIC = b"CKOB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIHH") # magic, version, plies covered, number of records, search depth, margin
+RECORD = struct.Struct("<QBBHI") # position key, start square, end square, weight, bit mask of the squares captured
+DEFAULT_PLIES = 4
+DEFAULT_DEPTH = 10
+DEFAULT_MARGIN = 15 # moves scoring up to this far behind the best are kept, a man is worth 100
+
+
+def positionKey(board, player):
+    return board.hash ^ transposition.sideKey(player)
+
+
+def scoreMoves(minimax, board, player, depth):
+    """Every legal move of the player with its exact score from a search depth plies deep, best first"""
+    scored = []
+    for move in minimax.getChildNode(board, player, None, 0):
+        undo = board.applyMove(move)
+        try:
+            score = minimax.search(board, depth-1, not player, minimax.minsize, minimax.maxsize, 1) # a full window so every move gets its true score, not just a bound
+        finally:
+            board.undoMove(undo)
+        scored.append((score, move))
+    scored.sort(key=lambda pair: pair[0], reverse=player == True) # stable, so ties keep the search's move order
+    return scored
+
+
+def bookMoves(scored, player, margin):
+    """The (move, weight) of every scored move within margin of the best, the best weighted margin + 1 and the rest less the further behind they are"""
+    if not scored:
+        return []
+    best = scored[0][0]
+    chosen = []
+    for score, move in scored:
+        behind = best - score if player == True else score - best
+        if behind > margin:
+            break
+        chosen.append((move, margin + 1 - behind))
+    return chosen
+
+
+def build(path, plies=DEFAULT_PLIES, depth=DEFAULT_DEPTH, margin=DEFAULT_MARGIN, weights=None, report=None):
+    """
+    Writes a book of every position reached in the first plies moves of a game, either side to move, with the moves a
+    search depth plies deep scores within margin of the best. Every legal move is followed to reach the next positions,
+    not just the book's own, so the book has an answer to anything the human plays. report(ply, positions, seconds) is
+    called after each ply is done.
+    """
+    minimax = Minimax(weights=weights)
+    records = []
+    seen = set()
+    frontier = [(Board(), False)] # black moves first
+    for ply in range(plies):
+        start = time.perf_counter()
+        following = []
+        for board, player in frontier:
+            key = positionKey(board, player)
+            if key in seen: # reached by another move order
+                continue
+            seen.add(key)
+            if board.checkWinner() != None:
+                continue
+            for move, weight in bookMoves(scoreMoves(minimax, board, player, depth), player, margin):
+                records.append((key, move.start, move.end, weight, capturedMask(move)))
+            if ply + 1 < plies:
+                for move in board.generateMoves(player):
+                    child = Board.fromEncoding(board.encode())
+                    child.applyMove(move)
+                    following.append((child, not player))
+        if report != None:
+            report(ply, len(frontier), time.perf_counter() - start)
+        frontier = following
+    records.sort()
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, plies, len(records), depth, margin))
+        for record in records:
+            file.write(RECORD.pack(*record))
+    return len(records)
+
+
+class OpeningBook:
+    """
+    A class to look moves up in an opening book file made by build(). The file is memory mapped, so opening it reads
+    nothing but the header and a lookup only touches the pages its binary search lands on.
+
+    ...
+    Attributes
+    -----------
+    path : string
+        The file the book was opened from
+    plies : int
+        The book covers positions up to this many plies into the game
+    depth : int
+        How deep the search that made the book went
+    size : int
+        The number of book moves in the file
+    probes : int
+        The number of positions looked up
+    hits : int
+        The number of positions looked up that were in the book
+    random : random.Random
+        Picks between the moves of a position
+
+    Methods
+    -------
+    lookup(board, player)
+        returns the (move, weight) of every book move of the position, an empty list if it is not in the book
+    choose(board, player)
+        returns a book move picked at random in proportion to the weights, None if the position is not in the book
+    close()
+        unmaps the file
+    """
+    def __init__(self, path, seed=None):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) # the mapping stays open after the file is closed
+        magic, version, self.plies, self.size, self.depth, margin = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a version " + str(VERSION) + " opening book")
+        self.probes = 0
+        self.hits = 0
+        self.random = random.Random(seed)
+
+    def keyAt(self, index):
+        return struct.unpack_from("<Q", self.data, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, board, player):
+        self.probes += 1
+        key = positionKey(board, player)
+        low, high = 0, self.size
+        while low < high: # the first record with a key at least key
+            middle = (low + high) // 2
+            if self.keyAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        legal = None
+        while low < self.size:
+            storedKey, start, end, weight, captured = RECORD.unpack_from(self.data, HEADER.size + low * RECORD.size)
+            if storedKey != key:
+                break
+            if legal == None:
+                legal = board.generateMoves(player)
+            for move in legal: # the legal move is returned, so a hash collision can never play an illegal one
+                if move.start == start and move.end == end and capturedMask(move) == captured:
+                    found.append((move, weight))
+                    break
+            low += 1
+        if found:
+            self.hits += 1
+        return found
+
+    def choose(self, board, player):
+        found = self.lookup(board, player)
+        if not found:
+            return None
+        moves, weights = zip(*found)
+        return self.random.choices(moves, weights)[0]
+
+    def close(self):
+        self.data.close()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Builds an opening book by searching every move of the positions near the start of the game, or looks a position up in one")
+    parser.add_argument("path", help="the book file to write, or to read with --position")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES, help=f"the book covers positions up to this many plies into the game (default {DEFAULT_PLIES}), each ply takes around 4 times longer than the last")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help=f"how deep every move is searched (default {DEFAULT_DEPTH})")
+    parser.add_argument("--margin", type=int, default=DEFAULT_MARGIN, help=f"moves scoring up to this far behind the best are kept for variety, a man is worth 100 (default {DEFAULT_MARGIN})")
+    parser.add_argument("--weights", default=None, help="JSON file of evaluation weights to search with, see evaluation.DEFAULT_WEIGHTS")
+    parser.add_argument("--position", default=None, help="a FEN-like position (see perft.py) to look up instead of building")
+    args = parser.parse_args(arguments)
+    if args.position != None:
+        from perft import parsePosition
+        board, player = parsePosition(args.position)
+        book = OpeningBook(args.path)
+        found = book.lookup(board, player)
+        if not found:
+            print("not in the book")
+            return 1
+        total = sum(weight for move, weight in found)
+        for move, weight in found:
+            print(f"{move.start + 1}{'x' if move.captured else '-'}{move.end + 1}  {weight / total:6.1%}")
+        return 0
+    if not 1 <= args.plies <= 65535 or not 1 <= args.depth <= 65535 or not 0 <= args.margin < 65535:
+        parser.error("--plies and --depth have to be at least 1 and --margin at least 0")
+    from evaluation import loadWeights
+    weights = loadWeights(args.weights) if args.weights != None else None
+    start = time.perf_counter()
+
+    def report(ply, positions, seconds):
+        print(f"ply {ply}  {positions:6d} positions  {seconds:8.2f}s")
+
+    size = build(args.path, args.plies, args.depth, args.margin, weights, report)
+    print(f"{size} book moves written to {args.path} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkersEngine import QUIESCENCE_LIMIT, Board, Minimax, SearchTimeout
+
+# each worker process keeps its own Minimax, so its transposition table carries over between the moves it is given
+_minimax = None
+_bound = None
+
+
+def _startWorker(bound, cancel, tableBytes, weights, batch, endgamePath, quiescenceLimit):
+    global _minimax, _bound
+    _minimax = Minimax(tableBytes, weights, batch, endgamePath, quiescenceLimit) # each worker maps the endgame table itself, sharing its pages with the others
+    _minimax.cancel = cancel
+    _bound = bound
+
+
+def _searchRootMove(position, player, depth, move, deadline):
+    """
+    Runs in a worker: rebuilds the board from its compact encoding, makes one root move and searches the reply.
+    The best score any worker has found so far is read from the shared bound before searching, so moves that cannot
+    beat it are cut off early, and written back if this move does better. Returns the move, its score (None if the
+    deadline passed first), the number of nodes searched and the alpha and beta it was searched with. The score is only
+    exact when it lies strictly between them, otherwise it is just a bound.
+    """
+    board = Board.fromEncoding(position)
+    board.applyMove(move)
+    if player == True: # the root is maximising, so the shared bound is its alpha
+        alpha, beta = _bound.value, _minimax.maxsize
+    else:
+        alpha, beta = _minimax.minsize, _bound.value
+    _minimax.deadline = deadline
+    _minimax.nodes = 0
+    try:
+        score = _minimax.search(board, depth-1, not player, alpha, beta, 1)
+    except SearchTimeout:
+        return move, None, _minimax.nodes, alpha, beta
+    finally:
+        _minimax.deadline = None
+    with _bound.get_lock():
+        if (player == True and score > _bound.value) or (player == False and score < _bound.value):
+            _bound.value = score
+    return move, score, _minimax.nodes, alpha, beta
+
+
+class ParallelSearch:
+    """
+    Splits the root moves of a search across a pool of worker processes
+
+    ...
+    Attributes
+    -----------
+    workers : int
+        The number of worker processes
+    bound : multiprocessing.Value
+        The best root score found so far in the current search, shared with every worker
+    cancel : multiprocessing.Event
+        The cancellation token, shared with every worker so setting it stops the whole search
+    pool : ProcessPoolExecutor
+        The worker processes, started once and reused for every move
+    minimax : Minimax
+        Used in this process to order the root moves and to search the first of them
+    nodes : int
+        The number of positions visited by the last search, by this process and the workers together
+
+    Methods
+    -------
+    minimaxMain(board, depth, player, alpha, beta)
+        The same as Minimax.minimaxMain: returns the best move and its evaluation. The first root move is searched here to
+        get a good bound (young brothers wait) and the rest are shared out between the workers
+    iterativeDeepening(board, player, timeLimit, maxDepth)
+        The same as Minimax.iterativeDeepening but every iteration is a parallel search
+    close()
+        Shuts the worker processes down
+    """
+    def __init__(self, workers=None, tableBytes=32 * 1024 * 1024, weights=None, batch=False, endgamePath=None, quiescenceLimit=QUIESCENCE_LIMIT):
+        self.workers = workers or os.cpu_count()
+        self.bound = multiprocessing.Value("q", 0) # a 64 bit integer holds every score including sys.maxsize
+        self.cancel = multiprocessing.Event()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_startWorker, initargs=(self.bound, self.cancel, tableBytes, weights, batch, endgamePath, quiescenceLimit))
+        self.minimax = Minimax(tableBytes, weights, batch, endgamePath, quiescenceLimit)
+        self.minimax.cancel = self.cancel
+        self.nodes = 0
+
+    def minimaxMain(self, board, depth, player, alpha, beta, deadline=None):
+        minimax = self.minimax
+        moves = minimax.getChildNode(board, player, None, 0)
+        if depth <= 1 or len(moves) <= 1 or board.checkWinner() != None: # nothing worth sharing out
+            minimax.deadline = deadline
+            try:
+                return minimax.minimaxMain(board, depth, player, alpha, beta)
+            finally:
+                minimax.deadline = None
+                self.nodes = minimax.nodes
+        undo = board.applyMove(moves[0]) # the eldest brother is searched first, here, so the others start with a real bound
+        minimax.deadline = deadline
+        minimax.nodes = 0
+        try:
+            bestScore = minimax.search(board, depth-1, not player, alpha, beta, 1)
+        finally:
+            minimax.deadline = None
+            board.undoMove(undo)
+        bestMove = moves[0]
+        self.nodes = minimax.nodes
+        self.bound.value = bestScore
+        position = board.encode()
+        futures = [self.pool.submit(_searchRootMove, position, player, depth, move, deadline) for move in moves[1:]]
+        scores = [future.result() for future in futures]
+        self.nodes += sum(result[2] for result in scores)
+        for move, score, nodes, low, high in scores: # scores come back in the order the moves were ordered, so ties go to the earlier move
+            if score == None:
+                raise SearchTimeout()
+            if not low < score < high: # cut off by a bound another worker found, so the move is no better than that worker's
+                continue
+            if (player == True and score > bestScore) or (player == False and score < bestScore):
+                bestMove, bestScore = move, score
+        minimax.bestMove = bestMove
+        return bestMove, bestScore
+
+    def iterativeDeepening(self, board, player, timeLimit=0.2, maxDepth=None):
+        start = time.perf_counter()
+        self.minimax.pv = []
+        self.minimax.clearOrdering()
+        bestMove, bestScore = None, None
+        depth = 1
+        while maxDepth == None or depth <= maxDepth:
+            deadline = None
+            if depth > 1:
+                deadline = start + timeLimit
+            try:
+                move, score = self.minimaxMain(board, depth, player, self.minimax.minsize, self.minimax.maxsize, deadline)
+            except SearchTimeout:
+                break
+            bestMove, bestScore = move, score
+            if move == None or self.minimax.decided(score):
+                break
+            if self.minimax.endgameCovers(board):
+                break
+            self.minimax.pv = [move] # the root move found best is tried first next time
+            if time.perf_counter() - start > timeLimit / 2:
+                break
+            depth += 1
+        return bestMove, bestScore
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
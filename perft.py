@@ -0,0 +1,185 @@
+import argparse
+import sys
+import time
+
+import bitboard
+from checkersEngine import Board
+
+# A position is written FEN-like as "<side to move>:R<red squares>:B<black squares>", squares numbered 1 to 32 in the
+# bitboard's order (row by row from black's side of the board, so black's counters start on 1 to 12) and a K in front
+# of a king. For example "B:R21,22,K30:B1,K9" is black to move with red men on 21 and 22, a red king on 30, a black
+# man on 1 and a black king on 9.
+START = "B:R21,22,23,24,25,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,10,11,12"
+
+# leaf node counts for depths 1, 2, 3... of each test position. The start position's counts are the published English
+# draughts figures, the rest were counted by the bitboard generator and agree with the scan and counters backends.
+REFERENCE = {
+    START: [7, 49, 302, 1469, 7361, 36768, 179740, 845931, 3963680],
+    # a red king that can hop four counters in a loop, either way round, ending where it started
+    "R:RK26:B1,14,15,22,23": [2, 4, 16, 24, 72, 144, 500, 764, 1612, 2752, 7616],
+    # a double hop that has to be finished
+    "R:R20,23,24,25,26,29,30,31:B1,2,3,5,8,9,11,14,16,22": [2, 18, 101, 516, 2455, 12307, 55077, 265743],
+    # an early middle game from a random game
+    "R:R18,19,20,23,26,29,30,31:B2,5,6,7,8,9,11,14,16": [1, 6, 28, 108, 390, 1521, 6416, 27293, 130636],
+    # kings and men, black has to hop twice with a king
+    "B:RK14,K19,22,27,30:BK10,K15,6,7,3": [2, 9, 31, 109, 628, 2865, 17798, 79072],
+    # a red man that hops a black king onto the crown row, crowned twice over, which ends its move
+    "R:R10,8,K28,22:BK6,3,23,16,12": [1, 5, 36, 183, 1205, 5973, 38139, 188781],
+    # nothing but kings
+    "B:RK21,K23,K30:BK2,K4,K11": [7, 56, 366, 2763, 20394, 165091],
+}
+
+
+def parsePosition(position):
+    """Builds the Board and player to move (True for red) described by a FEN-like string"""
+    side, *colours = position.strip().split(":")
+    if side not in ("R", "B") or len(colours) != 2:
+        raise ValueError("expected <R or B>:R<squares>:B<squares>, got " + repr(position))
+    bits = {"R": 0, "B": 0}
+    kingBits = 0
+    for colour in colours:
+        if colour[:1] not in bits:
+            raise ValueError("unknown colour in " + repr(colour))
+        for square in filter(None, colour[1:].split(",")):
+            king = square.startswith("K")
+            sq = int(square[1:] if king else square) - 1
+            if not 0 <= sq < 32:
+                raise ValueError("square " + square + " is not between 1 and 32")
+            bits[colour[0]] |= 1 << sq
+            if king:
+                kingBits |= 1 << sq
+    return Board.fromEncoding((bits["R"], bits["B"], kingBits)), side == "R"
+
+
+def writePosition(board, player):
+    """The FEN-like string of a board with player (True for red) to move"""
+    colours = []
+    for letter, bits in (("R", board.redBits), ("B", board.blackBits)):
+        squares = [("K" if (board.kingBits >> sq) & 1 else "") + str(sq + 1) for sq in bitboard.iterSquares(bits)]
+        colours.append(letter + ",".join(squares))
+    return ("R" if player == True else "B") + ":" + ":".join(colours)
+
+
+def counterMoves(board, player):
+    # the moves found by running checkValidMoves on every one of the player's counters, as Move tuples
+    colour = "red" if player == True else "black"
+    moves = []
+    for row in board.board:
+        for space in row:
+            if space != None and space.colour == colour:
+                start = bitboard.posToSquare(space.pos[0], space.pos[1])
+                validMoves, deletedCheckers = board.checkValidMoves(space)
+                if deletedCheckers: # when there is a capture every valid move is one, in the same order
+                    for (endRow, endCol), hopped in deletedCheckers:
+                        captured = tuple(bitboard.posToSquare(hop.pos[0], hop.pos[1]) for hop in hopped)
+                        moves.append(bitboard.Move(start, bitboard.posToSquare(endRow, endCol), captured))
+                else:
+                    for endRow, endCol in validMoves:
+                        moves.append(bitboard.Move(start, bitboard.posToSquare(endRow, endCol), ()))
+    return moves
+
+
+def scanMoves(board, player):
+    return board.scanMoves(player)
+
+
+def bitboardMoves(board, player):
+    if player == True:
+        return bitboard.legalMoves(board.redBits, board.blackBits, board.kingBits, bitboard.UP)
+    return bitboard.legalMoves(board.blackBits, board.redBits, board.kingBits, bitboard.DOWN)
+
+
+# the move generators perft can check, each takes a board and a player and returns that player's moves. A new backend
+# only has to be added here to be checked for speed and correctness against the reference counts.
+BACKENDS = {"counters": counterMoves, "scan": scanMoves, "bitboard": bitboardMoves}
+
+
+def perft(board, player, depth, generate=bitboardMoves):
+    """Counts the positions reached by playing every sequence of depth moves from board, generating moves with generate"""
+    moves = generate(board, player)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1 # the moves themselves are the leaves, so they are counted without being made
+    nodes = 0
+    for move in moves:
+        undo = board.applyMove(move)
+        try:
+            nodes += perft(board, not player, depth - 1, generate)
+        finally:
+            board.undoMove(undo)
+    return nodes
+
+
+def divide(board, player, depth, generate=bitboardMoves):
+    """The perft count below each of the player's moves, for finding where two backends disagree"""
+    counts = {}
+    for move in generate(board, player):
+        undo = board.applyMove(move)
+        try:
+            counts[move] = perft(board, not player, depth - 1, generate)
+        finally:
+            board.undoMove(undo)
+    return counts
+
+
+def runSuite(backend="bitboard", maxDepth=None, positions=None, report=None):
+    """
+    Runs perft on every position in positions (REFERENCE by default) for each depth that has a reference count, up to
+    maxDepth if given, with the named backend. Returns a row per position and depth of (position, depth, nodes,
+    expected nodes, seconds), also passing each to report as it is made. Nothing is left changed on the boards.
+    """
+    generate = BACKENDS[backend]
+    rows = []
+    for position, counts in (positions or REFERENCE).items():
+        board, player = parsePosition(position)
+        for depth, expected in enumerate(counts, 1):
+            if maxDepth != None and depth > maxDepth:
+                break
+            start = time.perf_counter()
+            nodes = perft(board, player, depth, generate)
+            row = (position, depth, nodes, expected, time.perf_counter() - start)
+            rows.append(row)
+            if report != None:
+                report(row)
+    return rows
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Counts the positions the move generator reaches, to check it is right and measure its speed")
+    parser.add_argument("--backend", default="bitboard", choices=sorted(BACKENDS), help="move generator to test")
+    parser.add_argument("--depth", type=int, default=None, help="deepest depth to count to, by default every reference count")
+    parser.add_argument("--position", default=None, help="a FEN-like position to count from instead of the test positions")
+    parser.add_argument("--divide", action="store_true", help="with --position, print the count below each move")
+    args = parser.parse_args(arguments)
+    if args.position != None and args.divide == True:
+        board, player = parsePosition(args.position)
+        counts = divide(board, player, args.depth or 1, BACKENDS[args.backend])
+        for move, nodes in sorted(counts.items()):
+            print(f"{move.start + 1}-{move.end + 1} {'x'.join(str(sq + 1) for sq in move.captured)}  {nodes}")
+        print(f"total {sum(counts.values())}")
+        return 0
+    positions = None
+    if args.position != None: # counted to --depth, checked against the reference counts if it is a test position
+        counts = REFERENCE.get(args.position, [])
+        depth = args.depth or max(len(counts), 1)
+        positions = {args.position: (counts + [None] * depth)[:depth]}
+    failures = 0
+
+    def report(row):
+        nonlocal failures
+        position, depth, nodes, expected, seconds = row
+        status = "" if expected == None else "ok" if nodes == expected else f"FAIL expected {expected}"
+        failures += expected != None and nodes != expected
+        print(f"{position[:40]:40s}  {depth:2d}  {nodes:10d}  {nodes / max(seconds, 1e-9):12.0f} nodes/s  {status}")
+
+    print(f"backend {args.backend}")
+    rows = runSuite(args.backend, args.depth, positions, report)
+    nodes, seconds = sum(row[2] for row in rows), sum(row[4] for row in rows)
+    print(f"{nodes} nodes in {seconds:.2f}s, {nodes / max(seconds, 1e-9):.0f} nodes/s")
+    if failures:
+        print(f"{failures} counts did not match the reference")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
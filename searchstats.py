@@ -0,0 +1,316 @@
+import cProfile
+import functools
+import json
+import time
+
+# where the time of a search goes, everything not in one of these (the alpha beta loop itself) is counted as "search"
+PHASES = ("generate", "order", "makeUnmake", "evaluate", "table")
+
+
+class SearchStats:
+    """
+    A class to hold what the search for one move did, made by a StatsRecorder
+
+    ...
+    Attributes
+    -----------
+    position : tuple
+        The encoding of the board searched, from Board.encode()
+    nodes : int
+        The positions visited over every iteration
+    seconds : float
+        The wall clock time the move took
+    depth : int
+        The deepest iteration that finished, 0 if none did
+    iterations : list
+        A (depth, nodes, seconds, finished) tuple for each iteration (each call to minimaxMain)
+    nodesPerPly : list
+        The positions visited at each ply from the root, not counting quiescence
+    cutoffsPerPly : list
+        The alpha beta cut offs at each ply from the root
+    tableProbes : int
+        Transposition table lookups, 0 when the table is off
+    tableHits : int
+        Transposition table lookups that found their position
+    endgameProbes : int
+        Positions looked up in the endgame table instead of being searched
+    quiescenceNodes : int
+        The positions visited by quiescence past the search's depth, over every iteration and also counted in nodes
+    quiescenceLimited : int
+        The nodes at the search's depth whose captures were left unfinished because quiescence ran out of budget
+    book : Boolean
+        True when the move was played from the opening book, so nothing was searched
+    phaseSeconds : dict
+        The seconds spent in each of PHASES, plus "search" for the rest
+
+    Methods
+    -------
+    nodesPerSecond()
+        returns the nodes searched per second
+    branchingFactor()
+        returns the effective branching factor, the nodes of the deepest finished iteration to the power 1 / its depth
+    asDict()
+        returns the stats as a dictionary that can be written as JSON
+    """
+    def __init__(self, position):
+        self.position = position
+        self.nodes = 0
+        self.seconds = 0.0
+        self.depth = 0
+        self.iterations = []
+        self.nodesPerPly = []
+        self.cutoffsPerPly = []
+        self.tableProbes = 0
+        self.tableHits = 0
+        self.endgameProbes = 0
+        self.quiescenceNodes = 0
+        self.quiescenceLimited = 0
+        self.book = False
+        self.phaseSeconds = dict.fromkeys(PHASES + ("search",), 0.0)
+
+    def nodesPerSecond(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def branchingFactor(self):
+        finished = [(depth, nodes) for depth, nodes, seconds, done in self.iterations if done == True]
+        if not finished:
+            return 0.0
+        depth, nodes = max(finished)
+        return nodes ** (1 / depth)
+
+    def asDict(self):
+        return {
+            "position": list(self.position),
+            "nodes": self.nodes,
+            "seconds": self.seconds,
+            "nodesPerSecond": self.nodesPerSecond(),
+            "depth": self.depth,
+            "branchingFactor": self.branchingFactor(),
+            "iterations": [list(iteration) for iteration in self.iterations],
+            "nodesPerPly": self.nodesPerPly,
+            "cutoffsPerPly": self.cutoffsPerPly,
+            "tableProbes": self.tableProbes,
+            "tableHits": self.tableHits,
+            "endgameProbes": self.endgameProbes,
+            "quiescenceNodes": self.quiescenceNodes,
+            "quiescenceLimited": self.quiescenceLimited,
+            "book": self.book,
+            "phaseSeconds": self.phaseSeconds,
+        }
+
+
+def makeProfiler(kind):
+    if kind == None:
+        return None
+    if kind == "cprofile":
+        return cProfile.Profile()
+    if kind == "pyinstrument":
+        try:
+            import pyinstrument
+        except ImportError:
+            raise ImportError("pyinstrument is not installed, install it with pip or profile with cprofile instead") from None
+        return pyinstrument.Profiler()
+    raise ValueError("unknown profiler " + repr(kind) + ", choose cprofile or pyinstrument")
+
+
+class StatsRecorder:
+    """
+    A class to collect a SearchStats for every move a Minimax searches. It works by putting timing and counting
+    wrappers over the methods of the Minimax, its table and the board being searched, on those instances only, so a
+    Minimax that has never had a recorder runs exactly the code it always did and pays nothing for it. Closing a
+    recorder puts everything back, though Python's attribute lookups on the instances stay a few percent slower.
+
+    ...
+    Attributes
+    -----------
+    minimax : Minimax
+        The search being recorded
+    history : list
+        The SearchStats of every move recorded so far
+    last : SearchStats
+        The stats of the last move, None before the first
+    log : file
+        The JSON lines file each move's stats are appended to, None for no log
+    profiler : cProfile.Profile or pyinstrument.Profiler
+        Runs during every move if given, its results are written to profilePath by close()
+    bookHits : int
+        The number of moves played from the opening book
+
+    Methods
+    -------
+    recordBookMove(board)
+        Records a move played from the opening book in place of a search
+    close()
+        Takes the wrappers off, writes the profile and closes the log
+    """
+    def __init__(self, minimax, logPath=None, profiler=None, profilePath=None):
+        self.minimax = minimax
+        self.history = []
+        self.last = None
+        self.current = None
+        self.log = open(logPath, "a") if logPath else None
+        self.profiler = makeProfiler(profiler)
+        self.profilePath = profilePath
+        self.bookHits = 0
+        self.wrapped = [] # (object, attribute, what to put back) for everything wrapped for as long as the recorder is attached
+        self.boardWrapped = [] # the same for the board, only while a move is being searched
+        self.wrap(self.wrapped, minimax, {
+            "iterativeDeepening": self.recordMove,
+            "minimaxMain": self.recordIteration,
+            "search": self.recordNode,
+            "recordCutoff": self.recordCutoff,
+            "orderMoves": functools.partial(self.timed, "order"),
+            "evaluate": functools.partial(self.timed, "evaluate"),
+            "evaluateBatch": functools.partial(self.timed, "evaluate"),
+            "frontierEvaluation": self.recordFrontier,
+        })
+        if minimax.table != None:
+            self.wrap(self.wrapped, minimax.table, {"probe": functools.partial(self.timed, "table"), "store": functools.partial(self.timed, "table")})
+
+    def wrap(self, wrapped, owner, handlers):
+        # Methods are wrapped by giving owner a subclass of its class that overrides them, and unwrapped by putting its
+        # class back. Adding and deleting instance attributes instead would leave every attribute lookup on owner a
+        # little slower for good, even after the recorder has gone.
+        cls = type(owner)
+        overrides = {}
+        instance = getattr(owner, "__dict__", {}) # a class with __slots__, like Board, has no instance dictionary
+        for name, handler in handlers.items():
+            if name in instance: # set on the instance, like an evaluation chosen for self play, so it is swapped there
+                previous = owner.__dict__[name]
+                owner.__dict__[name] = functools.partial(handler, previous)
+                wrapped.append((owner, name, previous))
+            else:
+                overrides[name] = self.override(handler, getattr(cls, name))
+        if overrides:
+            overrides["__slots__"] = () # adds no instance dictionary, so the class can be swapped on objects that have none
+            owner.__class__ = type(cls.__name__, (cls,), overrides)
+            wrapped.append((owner, "__class__", cls))
+
+    def override(self, handler, function):
+        def method(instance, *args):
+            return handler(function.__get__(instance), *args)
+        return method
+
+    def unwrap(self, wrapped):
+        for owner, name, previous in reversed(wrapped):
+            if name == "__class__":
+                owner.__class__ = previous
+            else:
+                owner.__dict__[name] = previous
+        wrapped.clear()
+
+    def timed(self, phase, function, *args):
+        if self.current == None:
+            return function(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.current.phaseSeconds[phase] += time.perf_counter() - start
+
+    def recordMove(self, function, board, *args):
+        if self.current != None: # already inside a move
+            return function(board, *args)
+        stats = SearchStats(board.encode())
+        self.current = stats
+        self.wrap(self.boardWrapped, board, {
+            "generateMoves": functools.partial(self.timed, "generate"),
+            "applyMove": functools.partial(self.timed, "makeUnmake"),
+            "undoMove": functools.partial(self.timed, "makeUnmake"),
+        })
+        table = self.minimax.table
+        before = table.counters() if table != None else None
+        endgame = self.minimax.endgame
+        endgameBefore = endgame.probes if endgame != None else 0
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.enable()
+        elif self.profiler != None:
+            self.profiler.start()
+        start = time.perf_counter()
+        try:
+            return function(board, *args)
+        finally:
+            stats.seconds = time.perf_counter() - start
+            if isinstance(self.profiler, cProfile.Profile):
+                self.profiler.disable()
+            elif self.profiler != None:
+                self.profiler.stop()
+            self.unwrap(self.boardWrapped)
+            if table != None:
+                after = table.counters()
+                stats.tableHits = after["hits"] - before["hits"]
+                stats.tableProbes = stats.tableHits + after["misses"] - before["misses"] + after["collisions"] - before["collisions"]
+            if endgame != None:
+                stats.endgameProbes = endgame.probes - endgameBefore
+            stats.phaseSeconds["search"] = max(0.0, stats.seconds - sum(stats.phaseSeconds[phase] for phase in PHASES))
+            self.current = None
+            self.finish(stats)
+
+    def recordBookMove(self, board):
+        stats = SearchStats(board.encode())
+        stats.book = True
+        self.bookHits += 1
+        self.finish(stats)
+
+    def finish(self, stats):
+        self.history.append(stats)
+        self.last = stats
+        if self.log != None:
+            self.log.write(json.dumps(stats.asDict()) + "\n")
+            self.log.flush()
+
+    def recordIteration(self, function, board, depth, *args):
+        if self.current == None: # a fixed depth search is a move of its own
+            return self.recordMove(functools.partial(self.recordIteration, function), board, depth, *args)
+        start = time.perf_counter()
+        finished = False
+        try:
+            result = function(board, depth, *args)
+            finished = True
+            return result
+        finally:
+            self.current.iterations.append((depth, self.minimax.nodes, time.perf_counter() - start, finished))
+            self.current.nodes += self.minimax.nodes
+            self.current.quiescenceNodes += self.minimax.quiescenceNodes
+            self.current.quiescenceLimited += self.minimax.quiescenceLimited
+            if finished == True:
+                self.current.depth = max(self.current.depth, depth)
+
+    def recordNode(self, function, board, depth, player, alpha, beta, ply=0):
+        if self.current != None:
+            perPly = self.current.nodesPerPly
+            while len(perPly) <= ply:
+                perPly.append(0)
+            perPly[ply] += 1
+        return function(board, depth, player, alpha, beta, ply)
+
+    def recordFrontier(self, function, board, player, alpha, beta, hashMove=None, ply=0):
+        # the children of a node scored as a batch are never searched, so they are counted here as the nodes of the next ply
+        before = self.minimax.nodes
+        try:
+            return function(board, player, alpha, beta, hashMove, ply)
+        finally:
+            if self.current != None:
+                perPly = self.current.nodesPerPly
+                while len(perPly) <= ply + 1:
+                    perPly.append(0)
+                perPly[ply + 1] += self.minimax.nodes - before
+
+    def recordCutoff(self, function, move, depth, ply):
+        if self.current != None:
+            perPly = self.current.cutoffsPerPly
+            while len(perPly) <= ply:
+                perPly.append(0)
+            perPly[ply] += 1
+        return function(move, depth, ply)
+
+    def close(self):
+        self.unwrap(self.wrapped)
+        if self.profiler != None and self.profilePath != None:
+            if isinstance(self.profiler, cProfile.Profile):
+                self.profiler.dump_stats(self.profilePath)
+            else:
+                with open(self.profilePath, "w") as file:
+                    file.write(self.profiler.output_text())
+        if self.log != None:
+            self.log.close()
@@ -0,0 +1,283 @@
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from checkersEngine import QUIESCENCE_LIMIT, Board, Minimax
+from evaluation import WeightedEvaluation, loadWeights
+from gamerecord import GameRecord, appendGame
+
+
+def materialEvaluation(board):
+    reds, blacks = board.returnNoCounters()
+    return reds - blacks
+
+
+# the evaluation functions an engine can be given by name, each takes a board and scores it from red's point of view
+EVALUATIONS = {"material": materialEvaluation, "weighted": WeightedEvaluation()}
+
+
+class EngineConfig:
+    """
+    A class to describe one engine taking part in self play
+
+    ...
+    Attributes
+    -----------
+    name : string
+        Used to label the engine in the results
+    depth : int
+        The deepest the engine searches, None for no limit
+    timeLimit : float
+        The seconds the engine may spend on each move with iterative deepening, None to always search to depth
+    evaluation : string
+        The name of the evaluation function to use from EVALUATIONS
+    weights : dict
+        Weights for the weighted evaluation in place of its defaults, None to keep them
+    tableBytes : int
+        The size of the engine's transposition table, 0 to turn it off
+    batch : Boolean
+        When True the leaves are scored a batch at a time with NumPy, only for the weighted evaluation
+    endgamePath : string
+        An endgame table file made by endgame.py for the engine to look positions with few counters up in, None for none
+    quiescenceLimit : int
+        The most positions the engine's quiescence search may visit from each node at its depth, 0 to turn it off
+
+    Methods
+    -------
+    makeEngine()
+        returns a Minimax set up as described
+    chooseMove(minimax, board, player)
+        searches the board with the engine and returns the move it picks and its score
+    """
+    def __init__(self, name, depth=None, timeLimit=0.1, evaluation="weighted", tableBytes=8 * 1024 * 1024, weights=None, batch=False, endgamePath=None, quiescenceLimit=QUIESCENCE_LIMIT):
+        if depth == None and timeLimit == None:
+            raise ValueError("an engine needs a depth, a time limit or both")
+        if evaluation not in EVALUATIONS:
+            raise ValueError("unknown evaluation " + repr(evaluation) + ", choose from " + ", ".join(EVALUATIONS))
+        if weights != None and evaluation != "weighted":
+            raise ValueError("weights are only used by the weighted evaluation")
+        if batch == True and evaluation != "weighted":
+            raise ValueError("only the weighted evaluation can score leaves in batches")
+        self.name = name
+        self.depth = depth
+        self.timeLimit = timeLimit
+        self.evaluation = evaluation
+        self.tableBytes = tableBytes
+        self.weights = weights
+        self.batch = batch
+        self.endgamePath = endgamePath
+        self.quiescenceLimit = quiescenceLimit
+
+    def makeEngine(self):
+        minimax = Minimax(self.tableBytes, self.weights, self.batch, self.endgamePath, self.quiescenceLimit)
+        if self.evaluation != "weighted": # the Minimax already scores with the weighted evaluation
+            minimax.evaluate = EVALUATIONS[self.evaluation]
+        return minimax
+
+    def chooseMove(self, minimax, board, player):
+        if self.timeLimit == None:
+            return minimax.minimaxMain(board, self.depth, player, minimax.minsize, minimax.maxsize)
+        return minimax.iterativeDeepening(board, player, self.timeLimit, self.depth)
+
+
+def playGame(game, first, second, openingMoves=2, maxPlies=200, seed=0, record=False):
+    """
+    Plays one game between two EngineConfigs without any GUI. The engines swap colours every game, first plays red in
+    even numbered games. The opening openingMoves plies are played at random (seeded by seed and game) so the games
+    are not all the same. A side with no counters or no valid moves loses, and the game is drawn after maxPlies plies.
+    Returns a dictionary describing the game, with the game's GameRecord under "record" if record is True.
+    """
+    if game % 2 == 0:
+        red, black = first, second
+    else:
+        red, black = second, first
+    engines = {True: red.makeEngine(), False: black.makeEngine()}
+    configs = {True: red, False: black}
+    nodes = {True: 0, False: 0}
+    seconds = {True: 0.0, False: 0.0}
+    moves = {True: 0, False: 0}
+    opening = random.Random(seed * 1000003 + game)
+    gameRecord = GameRecord({"Event": "Self play game " + str(game), "Black": black.name, "White": red.name})
+    board = Board()
+    player = False # black moves first
+    plies = 0
+    winner = None
+    start = time.perf_counter()
+    while winner == None:
+        if board.checkWinner() != None:
+            winner = board.checkWinner()
+            break
+        if plies >= maxPlies:
+            winner = "draw"
+            break
+        if plies < openingMoves:
+            valid = board.generateMoves(player)
+            move = opening.choice(valid) if valid else None
+            score = None
+        else:
+            moveStart = time.perf_counter()
+            move, score = configs[player].chooseMove(engines[player], board, player)
+            seconds[player] += time.perf_counter() - moveStart
+            nodes[player] += engines[player].nodes
+            moves[player] += 1
+        if move == None: # no valid moves, the other side wins
+            winner = "black" if player == True else "red"
+            break
+        board.applyMove(move)
+        gameRecord.addMove(move, score)
+        player = not player
+        plies += 1
+    gameRecord.finish(winner)
+    if winner == "draw":
+        firstScore = 0.5
+    else:
+        firstScore = 1.0 if (winner == "red") == (red is first) else 0.0
+    result = {
+        "game": game,
+        "red": red.name,
+        "black": black.name,
+        "winner": winner,
+        "firstScore": firstScore,
+        "plies": plies,
+        "redNodes": nodes[True],
+        "blackNodes": nodes[False],
+        "redSecondsPerMove": seconds[True] / max(1, moves[True]),
+        "blackSecondsPerMove": seconds[False] / max(1, moves[False]),
+        "seconds": time.perf_counter() - start,
+    }
+    if record == True:
+        result["record"] = gameRecord
+    return result
+
+
+def summarise(scores, elapsed):
+    """
+    Works out the first engine's results from its score in each game (1 win, 0.5 draw, 0 loss). Returns a dictionary
+    with the win, draw and loss counts, the mean score and Elo difference with 95% confidence intervals, and the
+    games played per second.
+    """
+    games = len(scores)
+    mean = sum(scores) / games
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / games)
+    margin = 1.96 * deviation / math.sqrt(games)
+    return {
+        "games": games,
+        "wins": scores.count(1.0),
+        "draws": scores.count(0.5),
+        "losses": scores.count(0.0),
+        "score": mean,
+        "scoreInterval": (max(0.0, mean - margin), min(1.0, mean + margin)),
+        "elo": eloDifference(mean),
+        "eloInterval": (eloDifference(mean - margin), eloDifference(mean + margin)),
+        "gamesPerSecond": games / elapsed,
+    }
+
+
+def eloDifference(score):
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+class ResultWriter:
+    """
+    A class to stream game results to a file as each game finishes, as JSON lines or, for a .csv path, as CSV
+
+    ...
+    Methods
+    -------
+    write(result)
+        appends one game's result dictionary and flushes it to disk
+    close()
+        closes the file
+    """
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.writer(self.file)
+            self.header = False
+
+    def write(self, result):
+        if self.csv != None:
+            if self.header == False:
+                self.csv.writerow(result.keys())
+                self.header = True
+            self.csv.writerow(result.values())
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def runMatch(first, second, games, workers=None, path=None, openingMoves=2, maxPlies=200, seed=0, progress=None, recordPath=None):
+    """
+    Plays games games between first and second across a pool of worker processes, writing each result to path as it
+    arrives if a path is given and passing it to progress if that is given. The record of every game is added to
+    recordPath if that is given, see gamerecord.appendGame. Returns the summary from summarise.
+    """
+    writer = ResultWriter(path) if path else None
+    scores = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            futures = [pool.submit(playGame, game, first, second, openingMoves, maxPlies, seed, recordPath != None) for game in range(games)]
+            for future in as_completed(futures):
+                result = future.result()
+                if recordPath != None:
+                    appendGame(recordPath, result.pop("record"))
+                scores.append(result["firstScore"])
+                if writer != None:
+                    writer.write(result)
+                if progress != None:
+                    progress(result)
+    finally:
+        if writer != None:
+            writer.close()
+    return summarise(scores, time.perf_counter() - start)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Plays two checkers engines against each other without a window")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the number of cores")
+    parser.add_argument("--out", default=None, help="file to stream results to, .csv for CSV otherwise JSON lines")
+    parser.add_argument("--record", default=None, help="file to add the record of every game to, PDN text if it ends in .pdn and packed otherwise (see gamerecord.py)")
+    parser.add_argument("--opening-moves", type=int, default=2, help="random plies at the start of each game")
+    parser.add_argument("--max-plies", type=int, default=200, help="plies before a game is called a draw")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random opening moves")
+    for engine in ("a", "b"):
+        parser.add_argument(f"--{engine}-depth", type=int, default=None, help=f"deepest engine {engine.upper()} searches")
+        parser.add_argument(f"--{engine}-time", type=float, default=0.1, help=f"seconds per move for engine {engine.upper()}, 0 to search to depth")
+        parser.add_argument(f"--{engine}-eval", default="weighted", choices=sorted(EVALUATIONS), help=f"evaluation for engine {engine.upper()}")
+        parser.add_argument(f"--{engine}-weights", default=None, help=f"JSON file of weights for engine {engine.upper()}'s weighted evaluation")
+        parser.add_argument(f"--{engine}-batch", action="store_true", help=f"score engine {engine.upper()}'s leaves in batches with NumPy")
+        parser.add_argument(f"--{engine}-endgame", default=None, help=f"endgame table file for engine {engine.upper()}, made by endgame.py")
+        parser.add_argument(f"--{engine}-quiescence", type=int, default=QUIESCENCE_LIMIT, help=f"positions engine {engine.upper()}'s quiescence search may visit from each node at its depth, 0 turns it off (default {QUIESCENCE_LIMIT})")
+    args = parser.parse_args(arguments)
+    first = EngineConfig("A", args.a_depth, args.a_time or None, args.a_eval, weights=loadWeights(args.a_weights) if args.a_weights else None, batch=args.a_batch, endgamePath=args.a_endgame, quiescenceLimit=args.a_quiescence)
+    second = EngineConfig("B", args.b_depth, args.b_time or None, args.b_eval, weights=loadWeights(args.b_weights) if args.b_weights else None, batch=args.b_batch, endgamePath=args.b_endgame, quiescenceLimit=args.b_quiescence)
+
+    def progress(result):
+        print(f"game {result['game']}: {result['red']} (red) v {result['black']} (black), {result['winner']} in {result['plies']} plies", file=sys.stderr)
+
+    summary = runMatch(first, second, args.games, args.workers, args.out, args.opening_moves, args.max_plies, args.seed, progress, args.record)
+    low, high = summary["eloInterval"]
+    print(f"A v B after {summary['games']} games: +{summary['wins']} ={summary['draws']} -{summary['losses']}")
+    print(f"score {summary['score']:.3f} (95% {summary['scoreInterval'][0]:.3f} to {summary['scoreInterval'][1]:.3f})")
+    print(f"Elo difference {summary['elo']:+.0f} (95% {low:+.0f} to {high:+.0f})")
+    print(f"{summary['gamesPerSecond']:.2f} games per second")
+
+
+if __name__ == "__main__":
+    main()
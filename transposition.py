@@ -0,0 +1,99 @@
+import random
+import sys
+
+# Zobrist keys, one random 64 bit number for every kind of piece on every playable square plus one for red to move.
+# A position's hash is the xor of the keys of everything on it, so a move only has to xor the changed squares in and out.
+# The generator is seeded so the same position always hashes to the same number, which lets hashes be stored on disk.
+_keys = random.Random(20231105)
+ZOBRIST = [[_keys.getrandbits(64) for sq in range(32)] for kind in range(4)] # black man, black king, red man, red king
+SIDE_KEY = _keys.getrandbits(64)
+
+EXACT = 0 # the score is the true minimax value of the position
+LOWER = 1 # the search failed high, the true value is at least the score
+UPPER = 2 # the search failed low, the true value is at most the score
+
+
+def sideKey(player):
+    if player == True: # red to move
+        return SIDE_KEY
+    return 0
+
+
+class TranspositionTable:
+    """
+    A fixed size hash table of positions that have already been searched
+
+    ...
+    Attributes
+    -----------
+    size : int
+        The number of buckets, a power of two so a hash is turned into a bucket with a mask
+    deepSlots : list
+        The depth preferred slot of each bucket, only replaced by a search at least as deep as the one stored
+    recentSlots : list
+        The always replace slot of each bucket, holds whatever was stored last that did not win the deep slot
+    hits : int
+        Probes that found their position
+    misses : int
+        Probes that found an empty bucket
+    collisions : int
+        Probes whose bucket was holding other positions
+    stores : int
+        The number of entries written
+
+    Methods
+    -------
+    probe(key)
+        returns the entry (key, depth, score, bound, move) stored for the hash key, or None
+    store(key, depth, score, bound, move)
+        saves a search result, replacing the deep slot if this search is at least as deep, otherwise the recent slot
+    clear()
+        empties the table and resets the counters
+    counters()
+        returns the hit, miss, collision and store counts as a dictionary
+    """
+    # the rough cost of one stored entry: the entry tuple, its 64 bit key and a list slot in each of the two slot lists
+    entryBytes = sys.getsizeof((0, 0, 0, 0, None)) + sys.getsizeof(2 ** 63) + 16
+
+    def __init__(self, maxBytes=32 * 1024 * 1024):
+        buckets = max(1, maxBytes // (2 * self.entryBytes))
+        self.size = 1 << (buckets.bit_length() - 1) # round down to a power of two so the cap is never exceeded
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        self.deepSlots = [None] * self.size
+        self.recentSlots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        index = key & self.mask
+        entry = self.deepSlots[index]
+        if entry != None and entry[0] == key:
+            self.hits += 1
+            return entry
+        recent = self.recentSlots[index]
+        if recent != None and recent[0] == key:
+            self.hits += 1
+            return recent
+        if entry == None and recent == None:
+            self.misses += 1
+        else:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        entry = (key, depth, score, bound, move)
+        deep = self.deepSlots[index]
+        if deep == None or deep[0] == key or depth >= deep[1]:
+            self.deepSlots[index] = entry
+        else:
+            self.recentSlots[index] = entry
+        self.stores += 1
+
+    def counters(self):
+        return {"hits": self.hits, "misses": self.misses, "collisions": self.collisions, "stores": self.stores}